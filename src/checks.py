@@ -0,0 +1,47 @@
+"""Bulk import and export of the url_checks history.
+
+Example:
+    python src/checks.py export history.parquet
+    python src/checks.py import history.parquet --db /srv/new_node/url_checks.db
+"""
+import argparse
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+from src.db.database import Database
+from src.db.bulk import import_file, export_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of url_checks (CSV or Parquet)")
+    parser.add_argument('--db', default='url_checks.db', help="SQLite database with url_checks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Append rows from a CSV/Parquet file")
+    import_parser.add_argument('input', help="File written by export, or any CSV/Parquet with a url column")
+    import_parser.add_argument('--batch-size', type=int, default=50000)
+    import_parser.add_argument('--keep-indexes', action='store_true',
+                               help="Update indexes per row instead of rebuilding them (small imports)")
+
+    export_parser = commands.add_parser('export', help="Stream rows to a CSV/Parquet file")
+    export_parser.add_argument('output', help="Output file (.csv or .parquet)")
+    export_parser.add_argument('--chunk-size', type=int, default=50000)
+    export_parser.add_argument('--since-id', type=int, default=0, help="Export only rows with a larger id")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    if args.command == 'import':
+        if not os.path.exists(args.input):
+            print(f"ERROR: Input file not found: {args.input}")
+            return 1
+        import_file(db, args.input, batch_size=args.batch_size, rebuild_indexes=not args.keep_indexes)
+    else:
+        export_file(db, args.output, chunk_size=args.chunk_size, since_id=args.since_id)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
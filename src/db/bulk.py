@@ -0,0 +1,177 @@
+"""Bulk import and streaming export of url_checks as CSV or Parquet.
+
+Both directions work in fixed-size chunks, so memory stays bounded for files
+with tens of millions of rows. Parquet support requires pyarrow.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+
+from .database import CHECK_COLUMNS
+from .verdict_index import url_key
+from ..features.url_parser import ParsedURL
+
+
+def _is_parquet(path):
+    return path.lower().endswith('.parquet')
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import/export requires pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+def _read_csv(path, batch_size):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def _read_parquet(path, batch_size):
+    _, pq = _pyarrow()
+    parquet_file = pq.ParquetFile(path)
+    columns = [name for name in parquet_file.schema_arrow.names if name in CHECK_COLUMNS]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pylist()
+
+
+def _empty(value):
+    return value is None or value == ''
+
+
+def _to_bool(value):
+    if _empty(value):
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 't', 'yes')
+    return bool(value)
+
+
+def _to_row(record):
+    """Convert one CSV/Parquet record to an IMPORT_COLUMNS tuple"""
+    url = record.get('url')
+    if _empty(url):
+        raise ValueError("Every imported row needs a url")
+
+    domain, key = record.get('domain'), record.get('url_key')
+    if _empty(domain) or _empty(key):
+        # Izvoz ih već sadrži; računaju se samo za vanjske datoteke
+        try:
+            parsed = ParsedURL(url)
+            domain = domain if not _empty(domain) else parsed.registered_domain
+            key = key if not _empty(key) else url_key(parsed.canonical)
+        except ValueError:
+            domain, key = domain or None, key or None
+
+    check_date = record.get('check_date')
+    if isinstance(check_date, datetime):
+        check_date = check_date.strftime('%Y-%m-%d %H:%M:%S')
+    features = record.get('features')
+    if isinstance(features, dict):
+        features = json.dumps(features)
+    confidence = record.get('confidence')
+
+    return (
+        url,
+        None if _empty(check_date) else check_date,
+        _to_bool(record.get('is_malicious')),
+        None if _empty(confidence) else float(confidence),
+        None if _empty(features) else features,
+        record.get('ip_address') or None,
+        record.get('status_message') or None,
+        domain or None,
+        record.get('model_version') or None,
+        None if _empty(key) else int(key),
+        record.get('source') or None,
+    )
+
+
+def import_file(db, path, batch_size=50000, rebuild_indexes=True):
+    """Import url_checks rows from a CSV (with header) or Parquet file; returns the row count.
+
+    Recognised columns are those written by export_file; only ``url`` is
+    required, ``id`` is ignored (rows get new ids).
+    """
+    start = time.perf_counter()
+    read = _read_parquet if _is_parquet(path) else _read_csv
+    batches = ([_to_row(record) for record in batch] for batch in read(path, batch_size))
+    count = db.bulk_insert(batches, rebuild_indexes=rebuild_indexes)
+    elapsed = time.perf_counter() - start
+    print(f"Imported {count} rows in {elapsed:.1f}s ({count / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+    return count
+
+
+class CsvCheckWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CHECK_COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetCheckWriter:
+    """Writes one row group per exported chunk"""
+
+    def __init__(self, path):
+        pa, pq = _pyarrow()
+        self.pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()),
+            ('url', pa.string()),
+            ('check_date', pa.string()),
+            ('is_malicious', pa.bool_()),
+            ('confidence', pa.float64()),
+            ('features', pa.string()),
+            ('ip_address', pa.string()),
+            ('status_message', pa.string()),
+            ('domain', pa.string()),
+            ('model_version', pa.string()),
+            ('url_key', pa.int64()),
+            ('source', pa.string())
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        # SQLite sprema BOOLEAN kao 0/1
+        malicious = CHECK_COLUMNS.index('is_malicious')
+        columns[malicious] = [None if value is None else bool(value) for value in columns[malicious]]
+        table = self.pa.Table.from_arrays(
+            [self.pa.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+            schema=self.schema
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+def export_file(db, path, chunk_size=50000, since_id=0):
+    """Stream url_checks rows (id > since_id) to a CSV or Parquet file; returns the row count"""
+    start = time.perf_counter()
+    writer = ParquetCheckWriter(path) if _is_parquet(path) else CsvCheckWriter(path)
+    count = 0
+    try:
+        for rows in db.iter_checks(chunk_size, since_id=since_id):
+            writer.write(rows)
+            count += len(rows)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Exported {count} rows in {elapsed:.1f}s ({count / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+    return count
@@ -1,6 +1,27 @@
 import sqlite3
 import json
 from datetime import datetime
+from ..features.url_parser import parse_url
+from .verdict_index import url_key
+
+# Stupci url_checks redom kojim ih izvoz zapisuje (id se kod uvoza ne prenosi)
+CHECK_COLUMNS = (
+    'id', 'url', 'check_date', 'is_malicious', 'confidence', 'features', 'ip_address',
+    'status_message', 'domain', 'model_version', 'url_key', 'source'
+)
+IMPORT_COLUMNS = CHECK_COLUMNS[1:]
+
+INDEXES = {
+    'idx_check_date': 'url_checks(check_date)',
+    'idx_url': 'url_checks(url)',
+    'idx_domain': 'url_checks(domain)',
+}
+
+
+def create_indexes(conn):
+    for name, target in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
 
 class Database:
     def __init__(self, db_file='url_checks.db'):
@@ -10,6 +31,8 @@ def __init__(self, db_file='url_checks.db'):
     def init_db(self):
         """Initialize database with required tables"""
         with sqlite3.connect(self.db_file) as conn:
+            # Nove baze vraćaju oslobođene stranice postupno (RetentionManager.compact)
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
             conn.executescript('''
                 CREATE TABLE IF NOT EXISTS url_checks (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -19,20 +42,123 @@ def init_db(self):
                     confidence FLOAT,
                     features JSON,
                     ip_address TEXT,
-                    status_message TEXT
+                    status_message TEXT,
+                    domain TEXT,
+                    model_version TEXT,
+                    url_key INTEGER,
+                    source TEXT
                 );
                 
-                CREATE INDEX IF NOT EXISTS idx_check_date ON url_checks(check_date);
-                CREATE INDEX IF NOT EXISTS idx_url ON url_checks(url);
+                -- Dnevni agregati arhiviranih redova (vidi RetentionManager)
+                CREATE TABLE IF NOT EXISTS url_checks_daily (
+                    day TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    total_count INTEGER NOT NULL,
+                    malicious_count INTEGER NOT NULL,
+                    safe_count INTEGER NOT NULL,
+                    PRIMARY KEY (day, domain)
+                );
             ''')
+            # Starije baze nemaju stupce domain, model_version, url_key i source
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(url_checks)')}
+            for column, column_type in (('domain', 'TEXT'), ('model_version', 'TEXT'), ('url_key', 'INTEGER'),
+                                        ('source', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE url_checks ADD COLUMN {column} {column_type}')
+            create_indexes(conn)
+    
+    def connect(self):
+        return sqlite3.connect(self.db_file)
     
-    def add_check(self, url, is_malicious, confidence, features, ip_address=None, status_message=None):
-        """Add new URL check to database"""
+    def add_check(self, url, is_malicious, confidence, features, ip_address=None, status_message=None,
+                  model_version=None, source=None):
+        """Add new URL check to database and return its row id.
+
+        The registered domain and the hashed canonical URL (used by VerdictIndex)
+        come from the cached ParsedURL. ``source`` says where the verdict came
+        from ('model', 'index', 'cache', 'whitelist', 'heuristic').
+        """
+        parsed = parse_url(url)
+        with sqlite3.connect(self.db_file) as conn:
+            cursor = conn.execute('''
+                INSERT INTO url_checks (url, is_malicious, confidence, features, ip_address, status_message,
+                                        domain, model_version, url_key, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, is_malicious, confidence, json.dumps(features), ip_address, status_message,
+                  parsed.registered_domain, model_version, url_key(parsed.canonical), source))
+            return cursor.lastrowid
+    
+    def bulk_insert(self, batches, rebuild_indexes=True):
+        """Insert batches of IMPORT_COLUMNS tuples in one transaction; returns the row count.
+
+        With ``rebuild_indexes`` the secondary indexes are dropped first and
+        built once at the end, which is much faster than updating them per
+        row. A missing check_date becomes the current time. On any error the
+        whole import (including the index changes) is rolled back.
+        """
+        placeholders = ', '.join('COALESCE(?, CURRENT_TIMESTAMP)' if column == 'check_date' else '?'
+                                 for column in IMPORT_COLUMNS)
+        sql = f"INSERT INTO url_checks ({', '.join(IMPORT_COLUMNS)}) VALUES ({placeholders})"
+        count = 0
+        conn = sqlite3.connect(self.db_file, isolation_level=None)
+        try:
+            conn.execute('PRAGMA cache_size = -65536')  # 64 MB cache stranica za izgradnju indeksa
+            conn.execute('BEGIN IMMEDIATE')
+            if rebuild_indexes:
+                for name in INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {name}')
+            for batch in batches:
+                conn.executemany(sql, batch)
+                count += len(batch)
+            create_indexes(conn)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return count
+    
+    def iter_checks(self, chunk_size=50000, since_id=0):
+        """Yield lists of CHECK_COLUMNS tuples ordered by id.
+
+        Each chunk is a separate keyset query (``id > last id``), so memory is
+        bounded by the chunk size and the read lock is released between chunks
+        instead of blocking writers for the whole export.
+        """
+        last_id = since_id
         with sqlite3.connect(self.db_file) as conn:
-            conn.execute('''
-                INSERT INTO url_checks (url, is_malicious, confidence, features, ip_address, status_message)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (url, is_malicious, confidence, json.dumps(features), ip_address, status_message))
+            while True:
+                rows = conn.execute(f'''
+                    SELECT {', '.join(CHECK_COLUMNS)} FROM url_checks
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, chunk_size)).fetchall()
+                if not rows:
+                    return
+                yield rows
+                last_id = rows[-1][0]
+    
+    def first_check_id(self, since):
+        """Id to pass as iter_checks(since_id=...) to read checks from ``since`` on.
+
+        Without such checks this is the largest id, so only new rows follow.
+        """
+        with sqlite3.connect(self.db_file) as conn:
+            first = conn.execute('SELECT MIN(id) FROM url_checks WHERE check_date >= ?', (since,)).fetchone()[0]
+            if first is not None:
+                return first - 1
+            return conn.execute('SELECT COALESCE(MAX(id), 0) FROM url_checks').fetchone()[0]
+    
+    def get_check_features(self, check_id):
+        """Stored feature dict of one check, or None if the row no longer exists"""
+        with sqlite3.connect(self.db_file) as conn:
+            row = conn.execute('SELECT features FROM url_checks WHERE id = ?', (check_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+    
+    def update_check_features(self, check_id, features):
+        """Replace the stored feature dict of one check (e.g. once the full vector is known)"""
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute('UPDATE url_checks SET features = ? WHERE id = ?', (json.dumps(features), check_id))
     
     def get_recent_checks(self, limit=50):
         """Get most recent URL checks"""
@@ -43,3 +169,72 @@ def get_recent_checks(self, limit=50):
                 ORDER BY check_date DESC 
                 LIMIT ?
             ''', (limit,)).fetchall()
+    
+    def get_dashboard_stats(self, top_domains=10):
+        """Aggregates shown on the /stats page (totals, most common domains, daily trend).
+
+        Raw rows in url_checks are combined with the daily rollups of rows
+        that the retention job has already archived.
+        """
+        with sqlite3.connect(self.db_file) as conn:
+            conn.row_factory = sqlite3.Row
+            
+            # Dohvaćamo ukupne brojeve
+            totals = conn.execute('''
+                SELECT 
+                    SUM(total_count) as total_checks,
+                    SUM(malicious_count) as malicious_count,
+                    SUM(safe_count) as safe_count
+                FROM (
+                    SELECT 
+                        COUNT(*) as total_count,
+                        SUM(CASE WHEN is_malicious THEN 1 ELSE 0 END) as malicious_count,
+                        SUM(CASE WHEN NOT is_malicious THEN 1 ELSE 0 END) as safe_count
+                    FROM url_checks
+                    UNION ALL
+                    SELECT SUM(total_count), SUM(malicious_count), SUM(safe_count) FROM url_checks_daily
+                )
+            ''').fetchone()
+            
+            # Dohvaćamo najčešće domene (stariji zapisi nemaju domain pa koristimo url)
+            domains = conn.execute('''
+                SELECT url, SUM(count) as count 
+                FROM (
+                    SELECT COALESCE(domain, url) as url, COUNT(*) as count 
+                    FROM url_checks 
+                    GROUP BY COALESCE(domain, url)
+                    UNION ALL
+                    SELECT domain, SUM(total_count) FROM url_checks_daily GROUP BY domain
+                )
+                GROUP BY url 
+                ORDER BY count DESC 
+                LIMIT ?
+            ''', (top_domains,)).fetchall()
+            
+            # Dohvaćamo dnevnu statistiku
+            daily = conn.execute('''
+                SELECT check_day, SUM(total_count) as total_count, SUM(malicious_count) as malicious_count
+                FROM (
+                    SELECT 
+                        date(check_date) as check_day,
+                        COUNT(*) as total_count,
+                        COUNT(CASE WHEN is_malicious THEN 1 END) as malicious_count
+                    FROM url_checks 
+                    GROUP BY date(check_date)
+                    UNION ALL
+                    SELECT day, SUM(total_count), SUM(malicious_count) FROM url_checks_daily GROUP BY day
+                )
+                GROUP BY check_day
+                ORDER BY check_day
+            ''').fetchall()
+        
+        return {
+            'total_checks': totals['total_checks'] or 0,
+            'malicious_detected': totals['malicious_count'] or 0,
+            'safe_urls': totals['safe_count'] or 0,
+            'domain_names': [d['url'] for d in domains],
+            'domain_counts': [d['count'] for d in domains],
+            'dates': [d['check_day'] for d in daily],
+            'daily_malicious': [d['malicious_count'] or 0 for d in daily],
+            'daily_total': [d['total_count'] for d in daily]
+        }
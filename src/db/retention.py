@@ -0,0 +1,227 @@
+"""Retention for url_checks: monthly archive partitions, daily rollups and compaction.
+
+Rows older than ``hot_days`` leave the hot table, so url_checks and its
+indexes stay bounded. They are appended to a monthly partition, either a
+table ``url_checks_YYYY_MM`` in the same database or, with ``archive_dir``,
+a separate file ``<archive_dir>/url_checks_YYYY_MM.db`` (attached while
+rows are moved). Each moved row is also counted in ``url_checks_daily``,
+which /stats combines with the hot rows, so dashboards keep the full
+history even after raw archives expire.
+"""
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from .database import CHECK_COLUMNS
+
+PARTITION_PATTERN = re.compile(r'^url_checks_(\d{4})_(\d{2})(?:\.db)?$')
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value):
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class RetentionManager:
+    def __init__(self, db, hot_days=90, archive_dir=None, keep_archive_months=None, batch_size=50000):
+        self.db = db
+        self.hot_days = hot_days
+        self.archive_dir = archive_dir
+        self.keep_archive_months = keep_archive_months
+        self.batch_size = batch_size
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db.db_file, isolation_level=None, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _partition(self, conn, month):
+        """Attach (if needed) and create the partition for a month; returns its qualified table name"""
+        name = f"url_checks_{month:%Y_%m}"
+        if self.archive_dir:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            conn.execute('ATTACH DATABASE ? AS archive', (os.path.join(self.archive_dir, f'{name}.db'),))
+            table = 'archive.url_checks'
+        else:
+            table = f'main.{name}'
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                check_date DATETIME,
+                is_malicious BOOLEAN,
+                confidence FLOAT,
+                features JSON,
+                ip_address TEXT,
+                status_message TEXT,
+                domain TEXT,
+                model_version TEXT,
+                url_key INTEGER,
+                source TEXT
+            )
+        ''')
+        # Particije nastale prije stupca source
+        schema, table_name = table.split('.')
+        if 'source' not in {row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table_name})')}:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN source TEXT')
+        return table
+
+    def archive(self, now=None):
+        """Move rows older than hot_days into monthly partitions; returns the number of moved rows.
+
+        Rows move in batches of ``batch_size``, each in its own short
+        transaction (copy to the partition, add to the daily rollup, delete
+        from url_checks), so web workers are never blocked for long.
+        """
+        now = now or datetime.utcnow()
+        # Rez na početku dana - dan je uvijek cijeli u vrućoj tablici ili u arhivi
+        cutoff = (now - timedelta(days=self.hot_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff_text = cutoff.strftime('%Y-%m-%d %H:%M:%S')
+        columns = ', '.join(CHECK_COLUMNS)
+        moved = 0
+
+        conn = self._connect()
+        try:
+            oldest = conn.execute('SELECT MIN(check_date) FROM url_checks WHERE check_date < ?',
+                                  (cutoff_text,)).fetchone()[0]
+            if oldest is None:
+                return 0
+            month = _month_start(datetime.strptime(oldest[:19], '%Y-%m-%d %H:%M:%S'))
+            while month < cutoff:
+                end = min(_next_month(month), cutoff).strftime('%Y-%m-%d %H:%M:%S')
+                start = month.strftime('%Y-%m-%d %H:%M:%S')
+                table = self._partition(conn, month)
+                try:
+                    while True:
+                        conn.execute('BEGIN IMMEDIATE')
+                        try:
+                            conn.execute('DROP TABLE IF EXISTS temp.retention_batch')
+                            conn.execute('''
+                                CREATE TEMP TABLE retention_batch AS
+                                SELECT id FROM url_checks WHERE check_date >= ? AND check_date < ? LIMIT ?
+                            ''', (start, end, self.batch_size))
+                            count = conn.execute('SELECT COUNT(*) FROM temp.retention_batch').fetchone()[0]
+                            if count:
+                                batch = 'id IN (SELECT id FROM temp.retention_batch)'
+                                conn.execute(f'INSERT OR IGNORE INTO {table} ({columns}) '
+                                             f'SELECT {columns} FROM main.url_checks WHERE {batch}')
+                                conn.execute(f'''
+                                    INSERT INTO url_checks_daily (day, domain, total_count, malicious_count, safe_count)
+                                    SELECT date(check_date), COALESCE(domain, url), COUNT(*),
+                                           SUM(CASE WHEN is_malicious THEN 1 ELSE 0 END),
+                                           SUM(CASE WHEN NOT is_malicious THEN 1 ELSE 0 END)
+                                    FROM main.url_checks WHERE {batch}
+                                    GROUP BY date(check_date), COALESCE(domain, url)
+                                    ON CONFLICT(day, domain) DO UPDATE SET
+                                        total_count = total_count + excluded.total_count,
+                                        malicious_count = malicious_count + excluded.malicious_count,
+                                        safe_count = safe_count + excluded.safe_count
+                                ''')
+                                conn.execute(f'DELETE FROM main.url_checks WHERE {batch}')
+                            conn.execute('DROP TABLE temp.retention_batch')
+                            conn.execute('COMMIT')
+                        except BaseException:
+                            conn.execute('ROLLBACK')
+                            raise
+                        moved += count
+                        if count < self.batch_size:
+                            break
+                finally:
+                    if self.archive_dir:
+                        conn.execute('DETACH DATABASE archive')
+                month = _next_month(month)
+        finally:
+            conn.close()
+        return moved
+
+    def archives(self):
+        """List (month start, location) of existing archive partitions, oldest first"""
+        if self.archive_dir:
+            names = os.listdir(self.archive_dir) if os.path.isdir(self.archive_dir) else []
+        else:
+            with sqlite3.connect(self.db.db_file) as conn:
+                names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        found = []
+        for name in names:
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                month = datetime(int(match.group(1)), int(match.group(2)), 1)
+                found.append((month, os.path.join(self.archive_dir, name) if self.archive_dir else name))
+        return sorted(found)
+
+    def drop_expired(self, now=None):
+        """Delete raw archive partitions older than keep_archive_months (rollups stay)"""
+        if self.keep_archive_months is None:
+            return []
+        month = _month_start(now or datetime.utcnow())
+        for _ in range(self.keep_archive_months):
+            month = (month - timedelta(days=1)).replace(day=1)
+        expired = [location for start, location in self.archives() if start < month]
+        for location in expired:
+            if self.archive_dir:
+                os.remove(location)
+            else:
+                with sqlite3.connect(self.db.db_file) as conn:
+                    conn.execute(f'DROP TABLE {location}')
+        return expired
+
+    def compact(self, step_pages=1000, pause=0.01):
+        """Return free pages to the filesystem in small incremental-vacuum steps.
+
+        Needs ``auto_vacuum = INCREMENTAL``, which new databases get from
+        Database.init_db; older files are converted once with
+        enable_incremental_vacuum(). Returns the number of freed pages.
+        """
+        conn = self._connect()
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                raise RuntimeError("Database is not in incremental auto-vacuum mode; "
+                                   "run enable_incremental_vacuum() once")
+            freed = 0
+            while True:
+                free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free:
+                    return freed
+                # execute() izvrši samo jedan korak pragme (jedna stranica); executescript ide do kraja
+                conn.executescript(f'PRAGMA incremental_vacuum({min(step_pages, free)})')
+                freed += free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+                time.sleep(pause)
+        finally:
+            conn.close()
+
+    def enable_incremental_vacuum(self):
+        """One-time conversion of an existing file (a full VACUUM that blocks writers while it runs)"""
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+
+    def vacuum_into(self, path):
+        """Write a compacted, consistent copy of the database (online; e.g. for backups)"""
+        conn = self._connect()
+        try:
+            conn.execute('VACUUM INTO ?', (path,))
+        finally:
+            conn.close()
+
+    def apply(self, now=None, compact=True):
+        """Run the whole policy: archive, drop expired archives, compact"""
+        start = time.perf_counter()
+        moved = self.archive(now)
+        expired = self.drop_expired(now)
+        freed = 0
+        if compact:
+            try:
+                freed = self.compact()
+            except RuntimeError as e:
+                print(f"Skipping compaction: {e}")
+        print(f"Archived {moved} rows, dropped {len(expired)} expired archives, "
+              f"freed {freed} pages in {time.perf_counter() - start:.1f}s")
+        return {'moved': moved, 'expired': expired, 'freed_pages': freed}
@@ -0,0 +1,220 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+IndexedVerdict = namedtuple('IndexedVerdict', 'row_id is_malicious confidence warning checked_at')
+
+# Redovi koji ulaze u indeks: presude trenutne verzije modela i heurističke presude
+# (heuristike ne ovise o modelu; prepoznaju se po status poruci)
+ELIGIBLE_ROWS = '''
+    FROM url_checks
+    WHERE id > ? AND check_date >= datetime('now', ?)
+      AND (model_version = ? OR (model_version IS NULL AND status_message IS NOT NULL))
+'''
+
+
+def url_key(canonical_url):
+    """Signed 64-bit hash of a canonical URL (fits an SQLite INTEGER column)"""
+    digest = hashlib.blake2b(canonical_url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class VerdictIndex:
+    """In-memory index of recent verdicts from url_checks, keyed by hashed canonical URL.
+
+    Entries live in parallel NumPy arrays sorted by key (8-byte key, row id,
+    float16 confidence, verdict flag, warning code and check time, 24 bytes
+    per URL) and are found with a binary search. New checks go into a small
+    dict first and are merged into the arrays in bulk. The confidence,
+    verdict and warning are served from memory; the row id points back to
+    url_checks for the stored features.
+
+    NumPy is imported only when the index is loaded or merged, so the web
+    process can import this module cheaply.
+    """
+
+    def __init__(self, max_age_days=30, merge_threshold=4096, sync_interval=5.0):
+        self.max_age = max_age_days * 86400
+        self.merge_threshold = merge_threshold
+        self.sync_interval = sync_interval
+        self.model_version = None
+        self.loaded = False
+        self.last_id = 0
+        self.load_seconds = None
+        self._last_sync = 0.0
+        self._warnings = [None]
+        self._warning_codes = {None: 0}
+        self._arrays = None  # (keys, row_ids, confidence, malicious, warning_codes, checked_at)
+        self._delta = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        arrays = self._arrays
+        return (len(arrays[0]) if arrays is not None else 0) + len(self._delta)
+
+    def _warning_code(self, warning):
+        code = self._warning_codes.get(warning)
+        if code is None:
+            code = len(self._warnings)
+            self._warnings.append(warning)
+            self._warning_codes[warning] = code
+        return code
+
+    def load(self, db, model_version=None, chunk_size=100000):
+        """Load eligible rows from the database (run in the warm-up stage)"""
+        import numpy as np
+
+        start = time.perf_counter()
+        with self._lock:
+            self.model_version = model_version
+            self._arrays = None
+            self._delta = {}
+            self.last_id = 0
+            parts = []
+            with db.connect() as conn:
+                cursor = conn.execute(f'''
+                    SELECT id, url_key, url, is_malicious, confidence, status_message,
+                           CAST(strftime('%s', check_date) AS INTEGER)
+                    {ELIGIBLE_ROWS}
+                    ORDER BY id
+                ''', (0, f'-{self.max_age} seconds', model_version))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    parts.append(self._rows_to_arrays(rows))
+                    self.last_id = rows[-1][0]
+            if parts:
+                arrays = [np.concatenate(columns) for columns in zip(*parts)]
+                # Isti URL provjeren više puta: zadržava se najnoviji red
+                # (np.unique vraća prvu pojavu, pa tražimo u obrnutom poretku)
+                _, first = np.unique(arrays[0][::-1], return_index=True)
+                keep = len(arrays[0]) - 1 - first
+                self._arrays = tuple(column[keep] for column in arrays)
+            self._last_sync = time.time()
+            self.loaded = True
+        self.load_seconds = time.perf_counter() - start
+        return len(self)
+
+    def _rows_to_arrays(self, rows):
+        import numpy as np
+
+        keys = np.fromiter(
+            # Stari redovi nemaju url_key pa se računa iz URL-a
+            (key if key is not None else self._key_for_url(url) for _, key, url, *_ in rows),
+            dtype=np.int64, count=len(rows)
+        )
+        return (
+            keys,
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((row[4] for row in rows), dtype=np.float16, count=len(rows)),
+            np.fromiter((bool(row[3]) for row in rows), dtype=np.bool_, count=len(rows)),
+            np.fromiter((self._warning_code(row[5]) for row in rows), dtype=np.uint8, count=len(rows)),
+            np.fromiter((row[6] for row in rows), dtype=np.uint32, count=len(rows)),
+        )
+
+    @staticmethod
+    def _key_for_url(url):
+        from ..features.url_parser import ParsedURL
+        try:
+            return url_key(ParsedURL(url).canonical)
+        except ValueError:
+            return url_key(url)
+
+    def add(self, canonical_url, row_id, is_malicious, confidence, warning=None, checked_at=None):
+        """Record a new check so later lookups of the same URL hit the index"""
+        verdict = IndexedVerdict(row_id, bool(is_malicious), float(confidence), warning,
+                                 int(checked_at if checked_at is not None else time.time()))
+        with self._lock:
+            self._warning_code(warning)
+            self._delta[url_key(canonical_url)] = verdict
+            if len(self._delta) >= self.merge_threshold:
+                self._merge()
+
+    def _merge(self):
+        """Merge the pending dict into the sorted arrays (caller holds the lock)"""
+        import numpy as np
+
+        items = sorted(self._delta.items())
+        new = (
+            np.array([key for key, _ in items], dtype=np.int64),
+            np.array([v.row_id for _, v in items], dtype=np.int64),
+            np.array([v.confidence for _, v in items], dtype=np.float16),
+            np.array([v.is_malicious for _, v in items], dtype=np.bool_),
+            np.array([self._warning_codes[v.warning] for _, v in items], dtype=np.uint8),
+            np.array([v.checked_at for _, v in items], dtype=np.uint32),
+        )
+        if self._arrays is None:
+            merged = new
+        else:
+            keys = self._arrays[0]
+            pos = keys.searchsorted(new[0])
+            exists = (pos < len(keys)) & (keys[np.minimum(pos, len(keys) - 1)] == new[0])
+            # Postojeće ključeve prepisujemo (kopija - čitatelji još vide stare nizove), nove umećemo
+            merged = []
+            for column, values in zip(self._arrays, new):
+                column = column.copy()
+                column[pos[exists]] = values[exists]
+                merged.append(np.insert(column, pos[~exists], values[~exists]))
+            merged = tuple(merged)
+        self._arrays = merged
+        self._delta = {}
+
+    def lookup(self, canonical_url, now=None):
+        """Return the latest IndexedVerdict for a URL, or None if unknown or too old"""
+        key = url_key(canonical_url)
+        verdict = self._delta.get(key)
+        arrays = self._arrays
+        if verdict is None and arrays is not None:
+            keys = arrays[0]
+            i = int(keys.searchsorted(key))
+            if i < len(keys) and keys[i] == key:
+                verdict = IndexedVerdict(int(arrays[1][i]), bool(arrays[3][i]), float(arrays[2][i]),
+                                         self._warnings[arrays[4][i]], int(arrays[5][i]))
+        if verdict is None:
+            return None
+        if verdict.checked_at < (now if now is not None else time.time()) - self.max_age:
+            return None
+        return verdict
+
+    def sync(self, db):
+        """Pull rows written since the last load/sync (e.g. by other workers)"""
+        with db.connect() as conn:
+            rows = conn.execute(f'''
+                SELECT id, url_key, url, is_malicious, confidence, status_message,
+                       CAST(strftime('%s', check_date) AS INTEGER)
+                {ELIGIBLE_ROWS}
+                ORDER BY id
+            ''', (self.last_id, f'-{self.max_age} seconds', self.model_version)).fetchall()
+        pending = {
+            key if key is not None else self._key_for_url(url):
+                IndexedVerdict(row_id, bool(is_malicious), float(confidence), warning, checked_at)
+            for row_id, key, url, is_malicious, confidence, warning, checked_at in rows
+        }
+        with self._lock:
+            for verdict in pending.values():
+                self._warning_code(verdict.warning)
+            self._delta.update(pending)
+            if rows:
+                self.last_id = max(self.last_id, rows[-1][0])
+            if len(self._delta) >= self.merge_threshold:
+                self._merge()
+        self._last_sync = time.time()
+        return len(rows)
+
+    def maybe_sync(self, db):
+        """Sync at most once per sync_interval seconds; does nothing before load()"""
+        if self.loaded and time.time() - self._last_sync >= self.sync_interval:
+            self.sync(db)
+
+    def memory_bytes(self):
+        arrays = self._arrays
+        return sum(column.nbytes for column in arrays) if arrays is not None else 0
+
+    def bytes_per_million(self):
+        """Array memory scaled to one million entries"""
+        arrays = self._arrays
+        if arrays is None or not len(arrays[0]):
+            return 0
+        return self.memory_bytes() / len(arrays[0]) * 1_000_000
@@ -0,0 +1,205 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# Zaštićeni brandovi (dodatni se mogu učitati iz datoteke, jedan po retku)
+DEFAULT_PROTECTED_BRANDS = [
+    'microsoft', 'google', 'facebook', 'apple', 'amazon', 'paypal',
+    'netflix', 'instagram', 'whatsapp', 'twitter', 'linkedin', 'youtube',
+    'outlook', 'office', 'hotmail', 'yahoo', 'gmail', 'icloud', 'dropbox',
+    'adobe', 'github', 'wikipedia', 'ebay', 'alibaba', 'aliexpress',
+    'booking', 'airbnb', 'spotify', 'steam', 'discord', 'telegram',
+    'tiktok', 'snapchat', 'coinbase', 'binance', 'blockchain', 'metamask',
+    'chase', 'wellsfargo', 'citibank', 'barclays', 'hsbc', 'santander',
+    'americanexpress', 'mastercard', 'visa', 'dhl', 'fedex', 'usps', 'walmart'
+]
+
+# Brandovi koji su i obične riječi: sam točan token (office-depot.com, visa.europa.eu,
+# steam-engine.org) nije imitacija, traži se tipfeler ili homoglif (0ffice, v1sa, stearn)
+COMMON_WORD_BRANDS = {
+    'apple', 'amazon', 'outlook', 'office', 'booking', 'steam', 'discord', 'telegram',
+    'blockchain', 'chase', 'visa'
+}
+
+# Znakovi koji vizualno nalikuju slovima (brojke, simboli, ćirilica, grčki)
+HOMOGLYPHS = {
+    '0': 'o', '1': 'l', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b',
+    '@': 'a', '$': 's', '!': 'i', '|': 'l',
+    'а': 'a', 'е': 'e', 'о': 'o', 'р': 'p', 'с': 'c', 'х': 'x', 'у': 'y',
+    'і': 'i', 'ј': 'j', 'ѕ': 's', 'ԁ': 'd', 'ӏ': 'l',
+    'α': 'a', 'ο': 'o', 'ρ': 'p', 'ν': 'v', 'ι': 'i', 'κ': 'k'
+}
+MULTI_CHAR_HOMOGLYPHS = [('rn', 'm'), ('vv', 'w')]
+SUBSTITUTION_DIGITS = set('013457')
+
+BrandMatch = namedtuple('BrandMatch', ['brand', 'distance', 'homoglyph'])
+
+# Susjedne tipke (QWERTY) - zamjena slova je tipfeler samo ako su tipke susjedne
+KEYBOARD_ROWS = ['1234567890', 'qwertyuiop', 'asdfghjkl', 'zxcvbnm']
+
+
+def _keyboard_neighbors():
+    neighbors = {}
+    for r, row in enumerate(KEYBOARD_ROWS):
+        for c, key in enumerate(row):
+            near = {row[i] for i in (c - 1, c + 1) if 0 <= i < len(row)}
+            if r > 0:
+                near.update(KEYBOARD_ROWS[r - 1][i] for i in (c, c + 1) if i < len(KEYBOARD_ROWS[r - 1]))
+            if r + 1 < len(KEYBOARD_ROWS):
+                near.update(KEYBOARD_ROWS[r + 1][i] for i in (c - 1, c) if 0 <= i < len(KEYBOARD_ROWS[r + 1]))
+            neighbors[key] = near
+    return neighbors
+
+
+KEYBOARD_NEIGHBORS = _keyboard_neighbors()
+
+
+def normalize_homoglyphs(token):
+    """Map look-alike characters to the letters they imitate"""
+    normalized = ''.join(HOMOGLYPHS.get(c, c) for c in token)
+    for pattern, replacement in MULTI_CHAR_HOMOGLYPHS:
+        normalized = normalized.replace(pattern, replacement)
+    return normalized
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance (Levenshtein + transpositions).
+
+    Returns max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def plausible_typo(term, brand, distance):
+    """Whether a near match looks like a mistyped brand rather than another word.
+
+    Typos keep the first and last letter (cooking, officer and booking do
+    not), and a single substituted letter must be a neighbouring key
+    (twitter -> twotter, but not twister).
+    """
+    if distance == 0:
+        return True
+    if term[0] != brand[0] or term[-1] != brand[-1]:
+        return False
+    if distance == 1 and len(term) == len(brand):
+        differences = [(a, b) for a, b in zip(term, brand) if a != b]
+        if len(differences) == 1:
+            typed, intended = differences[0]
+            return typed in KEYBOARD_NEIGHBORS.get(intended, ())
+    return True
+
+
+def _deletes(term, distance):
+    """All strings obtained by deleting up to `distance` characters from term"""
+    variants = frontier = {term}
+    for _ in range(min(distance, len(term) - 1)):
+        # Svaki korak briše još jedan znak iz varijanti prethodnog koraka
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants = variants | frontier
+    return variants
+
+
+class BrandIndex:
+    """SymSpell-style deletion index over protected brand names.
+
+    Every brand is stored under all of its deletion variants (up to its
+    allowed distance), so a lookup only hashes the deletion variants of the
+    query and verifies the few brands that share one. Lookup cost depends on
+    the query length, not on the number of brands; tokens longer than any
+    brand plus its allowed distance are rejected before generating variants.
+    """
+
+    def __init__(self, brands=None, max_distance=2, min_length=3, common_words=COMMON_WORD_BRANDS):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.common_words = {w.lower() for w in common_words}
+        self.brands = sorted({b.strip().lower() for b in (brands or DEFAULT_PROTECTED_BRANDS) if b.strip()})
+        self.deletes = {}
+        for brand in self.brands:
+            for variant in _deletes(brand, self._allowed_distance(brand)):
+                self.deletes.setdefault(variant, []).append(brand)
+        # Dulji token ne može biti ni na dopuštenoj udaljenosti od nijednog branda
+        self.max_token_length = max((len(b) + self._allowed_distance(b) for b in self.brands), default=0)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Build an index from a file with one brand per line"""
+        with open(path, encoding='utf-8') as f:
+            brands = [line.split('#')[0] for line in f]
+        return cls(brands, **kwargs)
+
+    def _allowed_distance(self, brand):
+        # Dopuštena udaljenost raste s duljinom branda; kratki brandovi (apple, steam,
+        # gmail) su preblizu običnim riječima pa se prepoznaju samo točno ili preko homoglifa
+        if len(brand) <= 5:
+            return 0
+        return min(self.max_distance, 1 if len(brand) <= 8 else 2)
+
+    def _lookup(self, term):
+        if len(term) > self.max_token_length:
+            return None
+        best = None
+        seen = set()
+        for variant in _deletes(term, self.max_distance):
+            for brand in self.deletes.get(variant, ()):
+                if brand in seen:
+                    continue
+                seen.add(brand)
+                allowed = self._allowed_distance(brand)
+                distance = edit_distance(term, brand, allowed)
+                if distance > allowed or not plausible_typo(term, brand, distance):
+                    continue
+                if best is None or distance < best[1]:
+                    best = (brand, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+    def nearest(self, token):
+        """Return the nearest protected brand within its allowed distance, or None"""
+        token = token.lower()
+        if len(token) < self.min_length:
+            return None
+        match = self._lookup(token)
+        normalized = normalize_homoglyphs(token)
+        if normalized != token:
+            homoglyph_match = self._lookup(normalized)
+            if homoglyph_match and (match is None or homoglyph_match[1] < match[1]):
+                return BrandMatch(homoglyph_match[0], homoglyph_match[1], True)
+        if match:
+            return BrandMatch(match[0], match[1], False)
+        return None
+
+    def imitated_brand(self, token):
+        """Like nearest(), but a common-word brand spelled exactly (office, visa) is not a match"""
+        match = self.nearest(token)
+        if match and match.distance == 0 and not match.homoglyph and match.brand in self.common_words:
+            return None
+        return match
+
+
+@lru_cache(maxsize=1)
+def get_default_brand_index():
+    """Shared index built once per process.
+
+    Uses the brand file from PROTECTED_BRANDS_FILE if set, otherwise
+    DEFAULT_PROTECTED_BRANDS.
+    """
+    brands_file = os.environ.get('PROTECTED_BRANDS_FILE')
+    if brands_file:
+        return BrandIndex.from_file(brands_file)
+    return BrandIndex()
@@ -1,12 +1,97 @@
 import re
-from urllib.parse import urlparse
-import numpy as np  # Ispravljeno iz "import numpy np"
 from collections import Counter
+from collections.abc import Mapping
 import math
-import pandas as pd
+from .brand_index import SUBSTITUTION_DIGITS, get_default_brand_index
+from .url_parser import ParsedURL, parse_url, split_host
+
+
+def _is_missing(value):
+    """Scalar NaN/None check (replaces pd.isna so serving does not import pandas)"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+# Grupe značajki redom kojim ulaze u vektor modela: (grupa, metoda, značajke)
+FEATURE_GROUPS = (
+    ('basic', '_get_basic_features', (
+        'url_length', 'special_char_count', 'digit_ratio', 'letter_ratio')),
+    ('domain', '_get_domain_features', (
+        'domain_length', 'has_ip', 'subdomain_count', 'domain_digit_ratio', 'has_valid_tld',
+        'domain_hyphen_count', 'domain_token_count', 'longest_domain_token', 'suspicious_domain',
+        'domain_length_suspicious', 'multiple_subdomains', 'is_shortened_url')),
+    ('brand', '_get_brand_features', (
+        'has_typosquatting', 'has_number_letter_substitution')),
+    ('path', '_get_path_features', (
+        'path_length', 'path_depth', 'has_query', 'query_length', 'fragment_length',
+        'path_token_count', 'query_param_count', 'path_extension', 'path_has_suspicious_word',
+        'query_has_suspicious_word', 'has_suspicious_chars', 'has_multiple_slashes', 'has_multiple_dots')),
+    ('chars', '_get_char_distribution', (
+        'vowel_ratio', 'consonant_ratio', 'uppercase_ratio')),
+    ('entropy', '_get_entropy_features', (
+        'url_entropy',)),
+    ('words', '_get_suspicious_word_features', (
+        'suspicious_word_count', 'has_suspicious_words')),
+)
+FEATURE_NAMES = tuple(name for _, _, names in FEATURE_GROUPS for name in names)
+_GROUP_OF_FEATURE = {name: group for group, _, names in FEATURE_GROUPS for name in names}
+_GROUP_METHODS = {group: method for group, method, _ in FEATURE_GROUPS}
+_GROUP_FEATURES = {group: names for group, _, names in FEATURE_GROUPS}
+
+
+def feature_row(features):
+    """Model input row of a feature dict, in FEATURE_NAMES (model column) order"""
+    return [features[name] for name in FEATURE_NAMES]
+
+
+class LazyFeatures(Mapping):
+    """Read-only feature mapping of one URL whose groups are computed on first access.
+
+    Looking up a feature computes (and memoizes) only the group it belongs
+    to, so the heuristics pay only for what they read. ``to_dict()``
+    materializes the full vector in model column order.
+    """
+
+    def __init__(self, extractor, parsed_url):
+        self.extractor = extractor
+        self.parsed_url = parsed_url
+        self._values = {}
+        self._groups = set()
+
+    def _compute(self, group):
+        try:
+            values = getattr(self.extractor, _GROUP_METHODS[group])(self.parsed_url)
+        except Exception as e:
+            print(f"Error processing URL: {self.parsed_url.url} ({group} features)")
+            print(f"Error: {str(e)}")
+            values = {name: 0 for name in _GROUP_FEATURES[group]}
+        # Ensure no NaN values
+        self._values.update({k: 0 if _is_missing(v) else v for k, v in values.items()})
+        self._groups.add(group)
+
+    def __getitem__(self, name):
+        group = _GROUP_OF_FEATURE[name]
+        if group not in self._groups:
+            self._compute(group)
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(FEATURE_NAMES)
+
+    def __len__(self):
+        return len(FEATURE_NAMES)
+
+    def computed(self):
+        """Features evaluated so far (the groups a decision actually needed)"""
+        return {name: self._values[name] for name in FEATURE_NAMES if name in self._values}
+
+    def to_dict(self):
+        return {name: self[name] for name in FEATURE_NAMES}
+
 
 class FeatureExtractor:
-    def __init__(self):
+    def __init__(self, brand_index=None):
+        # Indeks zaštićenih brandova gradi se jednom po procesu
+        self.brand_index = brand_index or get_default_brand_index()
         self.special_chars = ['@', '?', '!', '#', '$', '%', '^', '&', '*', '(', ')', '-', '+', '=', '[', ']', '{', '}', '|', '\\']
         
         # Converted to set for better performance
@@ -43,24 +128,15 @@ def __init__(self):
             '0' # Zero instead of 'o'
         }
 
+    def lazy_features(self, url):
+        """Features of a single URL (string or ParsedURL), computed group by group on access"""
+        parsed_url = url if isinstance(url, ParsedURL) else parse_url(url)
+        return LazyFeatures(self, parsed_url)
+
     def extract_features(self, url):
-        """Extract features from a single URL"""
+        """Extract all features from a single URL (string or ParsedURL)"""
         try:
-            features = {}
-            parsed_url = urlparse(url)
-            
-            # Basic features
-            features.update(self._get_basic_features(url))
-            features.update(self._get_domain_features(parsed_url))
-            features.update(self._get_path_features(parsed_url))
-            features.update(self._get_char_distribution(url))
-            features.update(self._get_entropy_features(url))
-            features.update(self._get_suspicious_word_features(url.lower()))
-            
-            # Ensure no NaN values
-            features = {k: 0 if pd.isna(v) else v for k, v in features.items()}
-            
-            return features
+            return self.lazy_features(url).to_dict()
         except Exception as e:
             print(f"Error processing URL: {url}")
             print(f"Error: {str(e)}")
@@ -68,23 +144,11 @@ def extract_features(self, url):
             return {k: 0 for k in self._get_feature_names()}
             
     def _get_feature_names(self):
-        """Get list of all feature names"""
-        return [
-            'url_length', 'special_char_count', 'digit_ratio', 'letter_ratio',
-            'domain_length', 'has_ip', 'subdomain_count', 'domain_digit_ratio',
-            'has_valid_tld', 'domain_hyphen_count', 'domain_token_count',
-            'longest_domain_token', 'path_length', 'path_depth', 'has_query',
-            'query_length', 'fragment_length', 'path_token_count',
-            'query_param_count', 'path_extension', 'vowel_ratio',
-            'consonant_ratio', 'uppercase_ratio', 'url_entropy',
-            'suspicious_word_count', 'has_suspicious_words',
-            'suspicious_domain', 'domain_length_suspicious', 'multiple_subdomains',
-            'path_has_suspicious_word', 'query_has_suspicious_word',
-            'has_suspicious_chars', 'has_multiple_slashes', 'has_multiple_dots',
-            'is_shortened_url', 'has_typosquatting', 'has_number_letter_substitution'
-        ]
+        """Get list of all feature names (in model column order)"""
+        return list(FEATURE_NAMES)
     
-    def _get_basic_features(self, url):
+    def _get_basic_features(self, parsed_url):
+        url = parsed_url.url
         return {
             'url_length': len(url),
             'special_char_count': sum(url.count(char) for char in self.special_chars),
@@ -93,8 +157,8 @@ def _get_basic_features(self, url):
         }
     
     def _get_domain_features(self, parsed_url):
-        domain = parsed_url.netloc.lower()
-        parts = domain.split('.')
+        domain = parsed_url.netloc
+        parts = parsed_url.netloc_parts
         
         features = {
             'domain_length': len(domain),
@@ -107,17 +171,18 @@ def _get_domain_features(self, parsed_url):
             'longest_domain_token': max(len(token) for token in parts) if parts else 0,
             'suspicious_domain': any(word in domain.lower() for word in self.suspicious_words),
             'domain_length_suspicious': len(domain) > 30,
-            'multiple_subdomains': domain.count('.') > 2
+            'multiple_subdomains': domain.count('.') > 2,
+            'is_shortened_url': any(shortener in domain for shortener in ['bit.ly', 'tinyurl.com', 'goo.gl', 't.co'])
         }
         
-        # Dodajemo nove provjere
-        features.update({
-            'is_shortened_url': any(shortener in domain for shortener in ['bit.ly', 'tinyurl.com', 'goo.gl', 't.co']),
-            'has_typosquatting': self._check_typosquatting(domain),
-            'has_number_letter_substitution': self._check_number_substitution(domain)
-        })
-        
         return features
+    
+    def _get_brand_features(self, parsed_url):
+        # Najskuplja grupa (pretraga indeksa brandova) - heuristike je čitaju zadnju
+        return {
+            'has_typosquatting': self._check_typosquatting(parsed_url.host),
+            'has_number_letter_substitution': self._check_number_substitution(parsed_url.host)
+        }
         
     def _get_path_features(self, parsed_url):
         path = parsed_url.path.lower()
@@ -130,7 +195,7 @@ def _get_path_features(self, parsed_url):
             'has_query': len(query) > 0,
             'query_length': len(query),
             'fragment_length': len(fragment),
-            'path_token_count': len([x for x in path.split('/') if x]),
+            'path_token_count': len(parsed_url.path_tokens),
             'query_param_count': len(query.split('&')) if query else 0,
             'path_extension': self._has_suspicious_extension(path),
             'path_has_suspicious_word': any(word in path for word in self.suspicious_words),
@@ -145,21 +210,24 @@ def _get_path_features(self, parsed_url):
     def _has_suspicious_extension(self, path):
         return any(path.lower().endswith(ext) for ext in self.suspicious_extensions)
 
-    def _get_char_distribution(self, url):
+    def _get_char_distribution(self, parsed_url):
+        url = parsed_url.url
         return {
             'vowel_ratio': sum(c.lower() in self.vowels for c in url) / len(url),
             'consonant_ratio': sum(c.lower() in self.consonants for c in url) / len(url),
             'uppercase_ratio': sum(c.isupper() for c in url) / len(url)
         }
     
-    def _get_entropy_features(self, url):
+    def _get_entropy_features(self, parsed_url):
+        url = parsed_url.url
         char_counts = Counter(url)
         entropy = self._calculate_entropy(char_counts, len(url))
         return {
             'url_entropy': entropy
         }
     
-    def _get_suspicious_word_features(self, url):
+    def _get_suspicious_word_features(self, parsed_url):
+        url = parsed_url.url.lower()
         return {
             'suspicious_word_count': sum(word in url for word in self.suspicious_words),
             'has_suspicious_words': any(word in url for word in self.suspicious_words)
@@ -181,25 +249,36 @@ def _get_default_features(self):
         """Return default feature values when URL processing fails"""
         return {name: 0 for name in self._get_feature_names()}
     
+    def _domain_tokens(self, domain):
+        """Yield (label, token) pairs for all labels except the public suffix"""
+        for label in split_host(domain)[0]:
+            yield label, label
+            if '-' in label:
+                for token in label.split('-'):
+                    yield label, token
+
     def _check_typosquatting(self, domain):
-        """Check for common typosquatting patterns"""
-        known_brands = ['microsoft', 'google', 'facebook', 'apple', 'amazon', 'paypal']
-        # Dodajemo provjeru za točnu domenu
-        if domain in ['www.google.com', 'google.com']:
-            return False
-        
-        # Dodana stroža provjera - mora sadržavati barem 70% znakova branda
-        for brand in known_brands:
-            if brand in domain and domain != brand:
-                similarity = sum(c in domain for c in brand) / len(brand)
-                if similarity > 0.7:
-                    return True
-        return False
+        """Check if the domain imitates a protected brand.
+
+        Flags tokens that look like a mistyped brand (see BrandIndex: long
+        brands only, same first and last letter, neighbouring-key
+        substitutions), tokens equal to a brand after homoglyph normalization
+        and exact brand names used outside the brand's own registered label
+        (e.g. paypal.evil.com, paypal-secure.com), except brands that are
+        also common words (office-depot.com, visa.europa.eu).
+        """
+        registered = split_host(domain)[1]
+        if registered in self.brand_index.brands:
+            return False  # Brand na vlastitoj domeni (npr. mail.google.com)
+        return any(self.brand_index.imitated_brand(token) is not None
+                   for _, token in self._domain_tokens(domain))
     
     def _check_number_substitution(self, domain):
-        """Check for number substitutions (0 for o, 1 for l, etc)"""
-        substitutions = {'0': 'o', '1': 'l', '3': 'e', '4': 'a', '5': 's'}
-        # Provjeravamo samo ako domena nije potpuno brojčana
-        if not domain.isdigit():
-            return any(num in domain for num in substitutions.keys())
+        """Check for digits standing in for letters of a protected brand (g00gle, paypa1)"""
+        for _, token in self._domain_tokens(domain):
+            if token.isdigit() or not SUBSTITUTION_DIGITS.intersection(token):
+                continue
+            match = self.brand_index.nearest(token)
+            if match is not None and match.homoglyph:
+                return True
         return False
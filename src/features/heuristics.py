@@ -0,0 +1,50 @@
+from .url_parser import ParsedURL, parse_url
+
+# Whitelist sigurnih domena
+KNOWN_SAFE_DOMAINS = {
+    'google.com', 'microsoft.com', 'github.com', 'wikipedia.org',
+    'python.org', 'apple.com', 'amazon.com', 'facebook.com'
+}
+
+# Confidence koji vraćaju whitelist i heuristička pravila
+HEURISTIC_CONFIDENCE = 0.95
+
+
+def _parsed(url):
+    return url if isinstance(url, ParsedURL) else parse_url(url)
+
+
+def is_known_safe(url):
+    """Check if the URL (string or ParsedURL) belongs to a whitelisted domain"""
+    return _parsed(url).registered_domain in KNOWN_SAFE_DOMAINS
+
+
+def has_immediate_flags(url, features):
+    """Check obvious malicious signals that decide the verdict without the model.
+
+    ``features`` may be a LazyFeatures mapping: checks run cheapest first and
+    stop at the first hit, so only the feature groups they read are computed
+    (the brand-index checks come last).
+    """
+    url = _parsed(url).url
+    checks = (
+        lambda: len(url) > 100,
+        lambda: any(word in url.lower() for word in ['admin', 'password', 'login']),
+        lambda: features.get('is_shortened_url', False),
+        lambda: features.get('suspicious_domain', False),
+        lambda: features.get('path_has_suspicious_word', False),
+        lambda: features.get('has_suspicious_chars', False),
+        lambda: features.get('suspicious_word_count', 0) > 2,
+        lambda: features.get('has_typosquatting', False),
+        lambda: features.get('has_number_letter_substitution', False),
+    )
+    return any(check() for check in checks)
+
+
+def heuristic_fallback(features):
+    """Verdict used when the model is unavailable"""
+    return bool(
+        features.get('suspicious_domain', False)
+        or features.get('has_suspicious_chars', False)
+        or features.get('suspicious_word_count', 0) > 1
+    )
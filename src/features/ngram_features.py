@@ -0,0 +1,45 @@
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+
+class HashedNgramFeatures:
+    """Hashed character n-gram features as a sparse (CSR) feature stage.
+
+    The hashing trick keeps no vocabulary, so memory depends only on
+    ``n_features`` and the batch size, never on how many distinct n-grams
+    occur in the data. The stage is stateless: two instances with the same
+    parameters produce identical columns.
+    """
+
+    def __init__(self, ngram_range=(3, 5), n_features=2 ** 18, batch_size=10000):
+        self.ngram_range = tuple(ngram_range)
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.vectorizer = HashingVectorizer(
+            analyzer='char',
+            ngram_range=self.ngram_range,
+            n_features=n_features,
+            lowercase=True,
+            alternate_sign=False,
+            norm='l2',
+            dtype=np.float32
+        )
+
+    def transform(self, urls):
+        """Hash URLs into a CSR matrix of shape (len(urls), n_features)"""
+        urls = [str(url) for url in urls]
+        if not urls:
+            return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        blocks = [
+            self.vectorizer.transform(urls[start:start + self.batch_size])
+            for start in range(0, len(urls), self.batch_size)
+        ]
+        return sparse.vstack(blocks, format='csr')
+
+    def combine(self, dense_features, urls):
+        """Append the n-gram columns to the dense feature matrix"""
+        dense = sparse.csr_matrix(np.asarray(dense_features, dtype=np.float32))
+        if dense.shape[0] != len(urls):
+            raise ValueError("Dense features and URLs must have the same number of rows")
+        return sparse.hstack([dense, self.transform(urls)], format='csr')
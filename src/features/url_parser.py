@@ -0,0 +1,78 @@
+from functools import lru_cache
+from urllib.parse import urlparse, parse_qsl
+
+# Dvodijelni sufiksi poput co.uk, com.au (uz dvoslovni TLD)
+SECOND_LEVEL_SUFFIXES = {'co', 'com', 'org', 'net', 'ac', 'gov', 'edu'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class ParsedURL:
+    """Canonical, parsed form of a URL shared by extraction, heuristics and storage.
+
+    Instances are created through parse_url(), which caches them, so every
+    component that needs the host labels or path tokens of a URL reuses the
+    same object instead of re-parsing and re-splitting the string.
+    """
+
+    __slots__ = (
+        'url', 'scheme', 'netloc', 'netloc_parts', 'host', 'port', 'labels', 'registered_label',
+        'registered_domain', 'path', 'params', 'path_tokens', 'query', 'query_params',
+        'fragment', 'canonical'
+    )
+
+    def __init__(self, url):
+        # urlparse (ne urlsplit): ;parametri zadnjeg segmenta nisu dio putanje, kao u
+        # izvornom extractoru, pa značajke putanje ostaju iste
+        parts = urlparse(url)
+        self.url = url
+        self.scheme = parts.scheme.lower()
+        self.netloc = parts.netloc.lower()
+        self.netloc_parts = tuple(self.netloc.split('.'))
+        self.host = (parts.hostname or '').rstrip('.')
+        try:
+            self.port = parts.port
+        except ValueError:
+            self.port = None
+        self.labels, self.registered_label, self.registered_domain = split_host(self.host)
+        self.path = parts.path
+        self.params = parts.params
+        self.path_tokens = tuple(token for token in parts.path.lower().split('/') if token)
+        self.query = parts.query
+        self.query_params = tuple(parse_qsl(parts.query, keep_blank_values=True))
+        self.fragment = parts.fragment
+
+        # Kanonski oblik: mala slova u shemi/hostu, bez defaultnog porta i fragmenta
+        host = self.host
+        if self.port and self.port != DEFAULT_PORTS.get(self.scheme):
+            host = f"{host}:{self.port}"
+        params = f";{self.params}" if self.params else ''
+        query = f"?{self.query}" if self.query else ''
+        self.canonical = f"{self.scheme}://{host}{self.path or '/'}{params}{query}" if self.scheme else url
+
+    def __repr__(self):
+        return f"ParsedURL({self.url!r})"
+
+
+@lru_cache(maxsize=4096)
+def split_host(host):
+    """Split a host into (labels, registered label, registered domain).
+
+    Labels exclude the public suffix; for 'mail.google.co.uk' this returns
+    (('mail', 'google'), 'google', 'google.co.uk').
+    """
+    labels = tuple(label for label in host.lower().split(':')[0].split('.') if label)
+    suffix_length = 1
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_SUFFIXES:
+        suffix_length = 2
+    if len(labels) <= suffix_length:
+        registered = labels[0] if labels else ''
+        return labels, registered, '.'.join(labels)
+    registered_domain = '.'.join(labels[-suffix_length - 1:])
+    labels = labels[:-suffix_length]
+    return labels, labels[-1], registered_domain
+
+
+@lru_cache(maxsize=4096)
+def parse_url(url):
+    """Return the cached ParsedURL for url"""
+    return ParsedURL(url)
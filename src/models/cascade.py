@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+
+
+def choose_thresholds(student_proba, teacher_labels, max_disagreement=0.005):
+    """Pick (low, high) so the student only answers where it agrees with the teacher.
+
+    ``low`` is the largest score for which the URLs scored at or below it
+    contain at most ``max_disagreement`` teacher-malicious ones; ``high`` is
+    the smallest score above ``low`` for which the URLs at or above it contain
+    at most that share of teacher-safe ones. Scores strictly between them are
+    escalated. Answered rows are labelled by argmax, so ``low`` stays below
+    0.5 and ``high`` above it (a biased student escalates more instead).
+    """
+    # Rad po jedinstvenim vrijednostima - jednaki scoreovi su uvijek na istoj strani praga
+    values, inverse = np.unique(np.asarray(student_proba), return_inverse=True)
+    total = np.bincount(inverse, minlength=len(values))
+    malicious = np.bincount(inverse, weights=np.asarray(teacher_labels) == 1, minlength=len(values))
+    safe = total - malicious
+
+    disagreement = np.cumsum(malicious) / np.cumsum(total)
+    # Ispod low student kaže "sigurno" samo ako je i njegov score ispod 0.5
+    ok = np.flatnonzero((disagreement <= max_disagreement) & (values < 0.5))
+    low = values[ok[-1]] if len(ok) else -1.0
+
+    # Gornji prag mora ostati iznad 0.5 (a time i iznad donjeg)
+    disagreement = np.cumsum(safe[::-1]) / np.cumsum(total[::-1])
+    ok = np.flatnonzero((disagreement <= max_disagreement) & (values[::-1] > 0.5))
+    high = values[::-1][ok[-1]] if len(ok) else 2.0
+
+    return float(low), float(high)
+
+
+class CascadeClassifier:
+    """Two-stage classifier: a small student answers confident cases, the teacher the rest.
+
+    The student is a regressor trained on the teacher's malicious-class
+    probability. Rows whose student score lies strictly between ``low`` and
+    ``high`` are escalated to the teacher. Exposes ``classes_``,
+    ``predict_proba`` and ``predict`` so it can be served like the teacher.
+    """
+
+    def __init__(self, student, teacher, low, high):
+        self.student = student
+        self.teacher = teacher
+        self.low = low
+        self.high = high
+        self.classes_ = teacher.classes_
+        self._malicious_column = list(self.classes_).index(1)
+
+    def escalation_mask(self, student_proba):
+        return (student_proba > self.low) & (student_proba < self.high)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        student_proba = np.clip(self.student.predict(X), 0.0, 1.0)
+        proba = np.empty((len(X), len(self.classes_)))
+        proba[:, self._malicious_column] = student_proba
+        proba[:, 1 - self._malicious_column] = 1.0 - student_proba
+        escalate = self.escalation_mask(student_proba)
+        if escalate.any():
+            proba[escalate] = self.teacher.predict_proba(X[escalate])
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def mean_latency_ms(model, X, n_rows=200):
+    """Mean single-row predict_proba latency, as /predict calls the model"""
+    X = np.asarray(X)[:n_rows]
+    start = time.perf_counter()
+    for row in X:
+        model.predict_proba(row.reshape(1, -1))
+    return (time.perf_counter() - start) / max(len(X), 1) * 1000
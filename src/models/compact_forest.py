@@ -0,0 +1,167 @@
+import numpy as np
+
+
+def _compact_tree(left, right, feature, threshold, proba, prune_tolerance):
+    """Re-layout one sklearn tree breadth-first with siblings stored next to each other.
+
+    Subtrees are collapsed into a single leaf (keeping the node's own
+    training distribution) when all their leaves fall in the same uint8 bin,
+    which is lossless, or when the node is already nearly pure: its minority
+    class share is at most prune_tolerance.
+    """
+    low = proba.copy()
+    high = proba.copy()
+    # U sklearn stablu djeca uvijek imaju veći indeks od roditelja
+    for i in range(len(left) - 1, -1, -1):
+        if left[i] != -1:
+            low[i] = min(low[left[i]], low[right[i]])
+            high[i] = max(high[left[i]], high[right[i]])
+    collapse = (np.rint(low * 255) == np.rint(high * 255)) | (np.minimum(proba, 1 - proba) <= prune_tolerance)
+
+    out_feature, out_threshold, out_left, out_value, depth = [], [], [], [], [0]
+    order = [0]
+    pos = 0
+    while pos < len(order):
+        i = order[pos]
+        if left[i] == -1 or collapse[i]:
+            out_feature.append(-1)
+            out_threshold.append(0.0)
+            out_left.append(-1)
+            out_value.append(proba[i])
+        else:
+            out_feature.append(feature[i])
+            out_threshold.append(threshold[i])
+            out_left.append(len(order))
+            out_value.append(0.0)
+            order.extend((left[i], right[i]))
+            depth.extend((depth[pos] + 1, depth[pos] + 1))
+        pos += 1
+    return (np.array(out_feature), np.array(out_threshold), np.array(out_left),
+            np.array(out_value), max(depth))
+
+
+class CompactForest:
+    """Quantized, array-based random forest for binary classification.
+
+    All trees share flat node arrays (feature, threshold code, left child,
+    leaf value); the right child of a node is always ``left + 1``. Thresholds
+    are stored either as uint8 codes into a per-feature table of the
+    thresholds the forest actually uses (exact when a feature has at most 256
+    distinct thresholds, otherwise quantile-binned) or as float16. Leaf
+    values are the malicious-class probability quantized to uint8.
+    Prediction walks all trees at once with vectorized NumPy steps.
+    """
+
+    def __init__(self, classes, feature, threshold, left, value, roots, max_depth,
+                 threshold_table=None):
+        self.classes_ = classes
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.threshold_table = threshold_table
+        self._malicious_column = list(classes).index(1)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_forest(cls, forest, threshold_dtype='uint8', prune_tolerance=0.0):
+        """Build a compact copy of a fitted RandomForestClassifier"""
+        column = list(forest.classes_).index(1)
+        n_features = forest.n_features_in_
+        parts = []
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            proba = value[:, column] / value.sum(axis=1)
+            parts.append(_compact_tree(tree.children_left, tree.children_right,
+                                       tree.feature, tree.threshold, proba, prune_tolerance))
+
+        sizes = np.array([len(part[0]) for part in parts])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        feature = np.concatenate([part[0] for part in parts])
+        threshold = np.concatenate([part[1] for part in parts])
+        left = np.concatenate([np.where(part[2] >= 0, part[2] + root, -1)
+                               for part, root in zip(parts, roots)]).astype(np.int32)
+        value = np.rint(np.concatenate([part[3] for part in parts]) * 255).astype(np.uint8)
+        max_depth = max(part[4] for part in parts)
+        feature = feature.astype(np.int8 if n_features < 128 else np.int16)
+
+        threshold_table = None
+        if threshold_dtype == 'uint8':
+            threshold_table = np.zeros((n_features, 256), dtype=np.float32)
+            codes = np.zeros(len(threshold), dtype=np.uint8)
+            for f in range(n_features):
+                mask = feature == f
+                if not mask.any():
+                    continue
+                used = np.unique(threshold[mask])
+                if len(used) > 256:
+                    # Kvantilni binovi iz stvarnih pragova tog featurea
+                    used = np.unique(np.quantile(used, np.linspace(0, 1, 256), method='nearest'))
+                table = np.full(256, used[-1], dtype=np.float32)
+                table[:len(used)] = used
+                threshold_table[f] = table
+                nearest = np.searchsorted(used, threshold[mask])
+                nearest = np.clip(nearest, 0, len(used) - 1)
+                below = np.clip(nearest - 1, 0, len(used) - 1)
+                closer = np.abs(used[below] - threshold[mask]) < np.abs(used[nearest] - threshold[mask])
+                codes[mask] = np.where(closer, below, nearest)
+            threshold = codes
+        elif threshold_dtype == 'float16':
+            threshold = threshold.astype(np.float16)
+        else:
+            raise ValueError(f"Unsupported threshold dtype: {threshold_dtype}")
+
+        return cls(forest.classes_, feature, threshold, left, value, roots, max_depth, threshold_table)
+
+    def truncate(self, n_trees):
+        """Return a forest with only the first n_trees trees (nodes of a tree are contiguous)"""
+        if n_trees >= self.n_estimators:
+            return self
+        end = self.roots[n_trees]
+        return CompactForest(self.classes_, self.feature[:end], self.threshold[:end], self.left[:end],
+                             self.value[:end], self.roots[:n_trees], self.max_depth, self.threshold_table)
+
+    def tree_proba(self, X):
+        """Malicious-class probability of every tree, shape (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            feature = np.where(internal, feature, 0)
+            if self.threshold_table is not None:
+                threshold = self.threshold_table[feature, self.threshold[node]]
+            else:
+                threshold = self.threshold[node].astype(np.float32)
+            go_right = X[rows, feature] > threshold
+            node = np.where(internal, self.left[node] + go_right, node)
+        return self.value[node] / 255.0
+
+    def _proba_from_malicious(self, malicious):
+        proba = np.empty((len(malicious), 2))
+        proba[:, self._malicious_column] = malicious
+        proba[:, 1 - self._malicious_column] = 1.0 - malicious
+        return proba
+
+    def predict_proba(self, X):
+        return self._proba_from_malicious(self.tree_proba(X).mean(axis=1))
+
+    def predict_from_malicious_proba(self, malicious):
+        """Class labels for given malicious-class probabilities (same rule as predict)"""
+        return self.classes_[self._proba_from_malicious(malicious).argmax(axis=1)]
+
+    def predict(self, X):
+        return self.predict_from_malicious_proba(self.tree_proba(X).mean(axis=1))
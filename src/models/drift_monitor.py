@@ -0,0 +1,197 @@
+"""Feature drift and throughput monitoring of production traffic.
+
+At training time ``build_profile`` bins every feature into at most ``bins``
+quantile bins of the training sample and stores the reference share of
+each bin (``train.py`` writes it to ``models/feature_profile.json``).
+``DriftMonitor`` counts production feature vectors into the same bins in a
+ring of fixed time windows, so memory is constant (windows x features x
+bins counters). It reports the population stability index (PSI) of each
+feature against the reference, plus check rates per verdict source.
+
+Only the profile builder needs numpy (imported lazily); the monitor itself
+is plain Python so the web process can use it.
+"""
+import json
+import math
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+
+# Uobičajeni pragovi za PSI: < 0.1 stabilno, 0.1 - 0.25 umjereno, > 0.25 značajan pomak
+DRIFT_THRESHOLD = 0.25
+PSI_EPSILON = 1e-4
+
+
+def _bin_edges(column, bins):
+    """Edges halfway between distinct values, so no training value lies on an edge"""
+    import numpy as np
+
+    column = column[np.isfinite(column)]
+    values = np.unique(column)
+    if len(values) <= 1:
+        return []
+    if len(values) > bins:
+        # Kvantili kao stvarne vrijednosti; granica je između kvantila i sljedeće vrijednosti
+        cuts = np.quantile(column, np.arange(1, bins) / bins, method='lower')
+        positions = np.unique(np.searchsorted(values, cuts))
+        positions = positions[positions < len(values) - 1]
+        lower, upper = values[positions], values[positions + 1]
+    else:
+        lower, upper = values[:-1], values[1:]
+    return [float(edge) for edge in (lower + upper) / 2]
+
+
+def build_profile(X, feature_names, labels=None, bins=10):
+    """Reference profile of a feature matrix (rows = URLs, columns = feature_names)"""
+    import numpy as np
+
+    X = np.asarray(X)
+    features = {}
+    for i, name in enumerate(feature_names):
+        column = X[:, i].astype(np.float64)
+        edges = _bin_edges(column, bins)
+        counts = np.bincount(np.searchsorted(edges, column, side='right'), minlength=len(edges) + 1)
+        features[name] = {'edges': edges, 'reference': (counts / max(len(column), 1)).tolist()}
+    return {
+        'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'rows': int(X.shape[0]),
+        'malicious_rate': float(np.mean(labels)) if labels is not None and len(labels) else None,
+        'feature_names': list(feature_names),
+        'features': features
+    }
+
+
+def save_profile(profile, path):
+    with open(path, 'w') as f:
+        json.dump(profile, f)
+
+
+def load_profile(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def psi(observed, reference):
+    """Population stability index of observed bin counts against reference bin shares"""
+    total = sum(observed)
+    if not total:
+        return None
+    score = 0.0
+    for count, expected in zip(observed, reference):
+        actual = max(count / total, PSI_EPSILON)
+        expected = max(expected, PSI_EPSILON)
+        score += (actual - expected) * math.log(actual / expected)
+    return score
+
+
+class _Window:
+    __slots__ = ('epoch', 'started', 'checks', 'malicious', 'sources', 'histograms')
+
+    def __init__(self, epoch, started, profile_features):
+        self.epoch = epoch
+        self.started = started  # prvi zapis u prozoru; od njega se mjeri propusnost
+        self.checks = 0
+        self.malicious = 0
+        self.sources = {}     # izvor presude -> [broj, ukupno sekundi]
+        self.histograms = {name: [0] * (len(spec['edges']) + 1) for name, spec in profile_features.items()}
+
+
+class DriftMonitor:
+    """Rolling per-feature histograms and check counters in constant memory.
+
+    Time is split into ``windows`` windows of ``window_seconds``; the oldest
+    window is reused once the ring is full. ``observe`` is thread-safe and
+    costs one bisect per feature.
+    """
+
+    def __init__(self, profile=None, window_seconds=300, windows=12, min_count=100):
+        self.window_seconds = window_seconds
+        self.min_count = min_count
+        self._lock = threading.Lock()
+        self.set_profile(profile, windows)
+
+    def set_profile(self, profile, windows=None):
+        """Switch to a new reference profile (e.g. after a model reload); clears all windows"""
+        with self._lock:
+            self.profile = profile
+            self._features = profile['features'] if profile else {}
+            size = windows or len(self._ring)
+            self._ring = [None] * size
+
+    def _window(self, now):
+        epoch = int(now // self.window_seconds)
+        slot = epoch % len(self._ring)
+        window = self._ring[slot]
+        if window is None or window.epoch != epoch:
+            if window is not None and window.epoch > epoch:
+                return None  # Prestar zapis (npr. pri čitanju povijesti iz baze)
+            window = self._ring[slot] = _Window(epoch, now, self._features)
+        return window
+
+    def observe(self, features=None, is_malicious=None, source='model', seconds=None, now=None):
+        """Count one check; features (a dict) only for vectors that reached the model"""
+        with self._lock:
+            window = self._window(time.time() if now is None else now)
+            if window is None:
+                return
+            window.checks += 1
+            if is_malicious:
+                window.malicious += 1
+            counter = window.sources.setdefault(source, [0, 0.0])
+            counter[0] += 1
+            if seconds is not None:
+                counter[1] += seconds
+            if features:
+                for name, spec in self._features.items():
+                    value = features.get(name)
+                    if value is not None:
+                        window.histograms[name][bisect_right(spec['edges'], value)] += 1
+
+    def report(self, windows=None, now=None):
+        """Drift scores and throughput over the last ``windows`` windows (default: all)"""
+        now = time.time() if now is None else now
+        current = int(now // self.window_seconds)
+        span = min(windows or len(self._ring), len(self._ring))
+        with self._lock:
+            recent = [w for w in self._ring if w is not None and current - span < w.epoch <= current]
+            checks = sum(w.checks for w in recent)
+            malicious = sum(w.malicious for w in recent)
+            sources = {}
+            for w in recent:
+                for source, (count, seconds) in w.sources.items():
+                    total = sources.setdefault(source, [0, 0.0])
+                    total[0] += count
+                    total[1] += seconds
+            histograms = {name: [sum(counts) for counts in zip(*(w.histograms[name] for w in recent))]
+                          for name in self._features} if recent else {}
+
+        elapsed = (now - min(w.started for w in recent)) if recent else 0.0
+        features = {}
+        for name, spec in self._features.items():
+            counts = histograms.get(name) or []
+            count = sum(counts)
+            score = psi(counts, spec['reference']) if count >= self.min_count else None
+            features[name] = {'count': count, 'psi': None if score is None else round(score, 4)}
+
+        return {
+            'window_seconds': self.window_seconds,
+            'windows': span,
+            'elapsed_seconds': round(elapsed, 1),
+            'checks': checks,
+            'checks_per_second': round(checks / elapsed, 3) if elapsed > 0 else 0.0,
+            'malicious_rate': round(malicious / checks, 4) if checks else None,
+            'reference_malicious_rate': self.profile.get('malicious_rate') if self.profile else None,
+            'sources': {
+                source: {
+                    'checks': count,
+                    'checks_per_second': round(count / elapsed, 3) if elapsed > 0 else 0.0,
+                    'mean_ms': round(seconds / count * 1000, 3) if seconds else None
+                }
+                for source, (count, seconds) in sorted(sources.items())
+            },
+            'features': features,
+            'drifted': sorted((name for name, item in features.items()
+                               if item['psi'] is not None and item['psi'] > DRIFT_THRESHOLD),
+                              key=lambda name: -features[name]['psi'])
+        }
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceScheduler:
+    """Collects concurrent scoring requests into micro-batches.
+
+    Request threads call ``submit(row)`` (or ``score(row)``) and wait on the
+    returned future. One background thread takes the first waiting row, keeps
+    collecting rows until ``max_batch_size`` is reached or ``max_wait_ms`` has
+    passed since that first row, and then scores the whole batch with a single
+    ``predict_fn(rows)`` call. The i-th result goes back to the i-th request.
+    The model is only ever called from the scheduler thread.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_started(self):
+        # Dretva se pokreće tek kod prvog zahtjeva (i nakon forka u workeru)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """Queue one feature row; returns a Future with its prediction"""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((row, future))
+        return future
+
+    def score(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def close(self):
+        """Stop the scheduler thread after the rows already queued are scored"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    @property
+    def mean_batch_size(self):
+        return self.rows / self.batches if self.batches else 0.0
+
+    def _collect(self):
+        """Block for the first row, then gather more until the batch is full or the window closes"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Zaustavljanje: dovrši trenutni batch, pa izađi
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Zahtjevi koji su u međuvremenu otkazani ne idu u model
+            batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.predict_fn([row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+import time
+
+DEFAULT_MODEL_FILENAME = 'best_model_random_forest.joblib'
+
+
+def model_filename_from_env():
+    """Served model file in the models directory (train.py saves best_model_<name>.joblib)"""
+    return os.environ.get('URL_DETECTOR_MODEL', DEFAULT_MODEL_FILENAME)
+
+
+class ModelServer:
+    """Serving-side wrapper around a trained model.
+
+    Unlike ModelTrainer it does not import scikit-learn, pandas or numpy at
+    module level; joblib (and through unpickling the model's own dependencies)
+    is imported only when the model is loaded during warm-up.
+    """
+
+    def __init__(self, model_path='models', filename=DEFAULT_MODEL_FILENAME):
+        self.model_path = model_path
+        self.filename = filename
+        self.model = None
+        self.load_seconds = None
+        self.version = None
+        self._load_lock = threading.RLock()
+
+    @property
+    def model_file(self):
+        return os.path.join(self.model_path, self.filename)
+
+    def is_loaded(self):
+        return self.model is not None
+
+    def load(self):
+        """Load the model from disk (imports joblib lazily)"""
+        if not os.path.exists(self.model_file):
+            raise FileNotFoundError(f"Model file not found: {self.model_file}")
+        import joblib
+
+        with self._load_lock:
+            start = time.perf_counter()
+            model = joblib.load(self.model_file)
+            self.load_seconds = time.perf_counter() - start
+            self.version = self._file_version()
+            self.model = model
+        return self.model
+
+    def _file_version(self):
+        """Short content hash of the model file; verdicts are stored with it"""
+        digest = hashlib.sha1()
+        with open(self.model_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return f"{self.filename}:{digest.hexdigest()[:12]}"
+
+    def ensure_loaded(self):
+        if self.model is None:
+            # Više dretvi može istovremeno naići na neučitan model - učitava ga samo jedna
+            with self._load_lock:
+                if self.model is None:
+                    self.load()
+        return self.model
+
+    @property
+    def uses_ngrams(self):
+        """True if the loaded model was trained with hashed n-gram columns (see ModelTrainer.save_model)"""
+        return getattr(self.model, 'ngram_stage_', None) is not None
+
+    def _model_input(self, model, feature_rows, urls):
+        stage = getattr(model, 'ngram_stage_', None)
+        if stage is None:
+            return feature_rows
+        if urls is None:
+            raise ValueError("URLs are required for models that use n-gram features")
+        # Isti CSR blok kao pri treniranju: gusti stupci + hashirani n-grami URL-a
+        return stage.combine(feature_rows, urls)
+
+    def predict_proba(self, feature_rows, urls=None):
+        """Return class probabilities for a list of feature rows (urls are needed for n-gram models)"""
+        model = self.ensure_loaded()
+        return model.predict_proba(self._model_input(model, feature_rows, urls))
+
+    def predict(self, feature_rows, urls=None):
+        model = self.ensure_loaded()
+        return model.predict(self._model_input(model, feature_rows, urls))
+
+    def malicious_proba(self, feature_rows, urls=None):
+        """Return the probability of the malicious class (label 1) for each row"""
+        model = self.ensure_loaded()
+        column = list(model.classes_).index(1)
+        return model.predict_proba(self._model_input(model, feature_rows, urls))[:, column]
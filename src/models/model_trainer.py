@@ -1,17 +1,49 @@
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import GridSearchCV, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.metrics import classification_report, confusion_matrix, f1_score
 import pandas as pd
 import numpy as np
 import joblib
+import json
 import os
+import tempfile
+import time
+import warnings
+from .search_cache import SearchCache, dataset_fingerprint, search_key
+from .cascade import CascadeClassifier, choose_thresholds, mean_latency_ms
+from .compact_forest import CompactForest
+
+
+def _fit_and_score(estimator, params, X, y, train, test):
+    """Fit one parameter combination on one CV fold and return its weighted F1"""
+    model = clone(estimator).set_params(**params)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore')
+        model.fit(X[train], y[train])
+    return f1_score(y[test], model.predict(X[test]), average='weighted')
+
+
+def _refit(estimator, params, X, y):
+    model = clone(estimator).set_params(**params)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore')
+        return model.fit(X, y)
+
 
 class ModelTrainer:
-    def __init__(self, model_path='models'):
+    def __init__(self, model_path='models', ngram_stage=None, search_cache_dir=None, cv=5, n_jobs=-1):
         self.model_path = model_path
+        self.cv = cv
+        self.n_jobs = n_jobs
+        # Rezultati pretrage se spremaju po (otisak podataka, model, parametri)
+        self.search_cache = SearchCache(search_cache_dir or os.path.join(model_path, 'search_cache'))
         self.current_model = None
         self.current_model_name = None
+        # Opcionalni HashedNgramFeatures stage (samo za modele sa 'sparse_ngrams')
+        self.ngram_stage = ngram_stage
+        self.current_uses_ngrams = False
         
         # Improved parameter grids
         self.param_grids = {
@@ -32,52 +64,97 @@ def __init__(self, model_path='models'):
                     'max_iter': [5000],      # Povećali smo broj iteracija
                     'solver': ['liblinear'], # Maknuli smo 'saga' jer je sporiji
                     'class_weight': ['balanced']
-                }
+                },
+                'sparse_ngrams': True  # Koristi n-gram stage ako je zadan
             }
         }
         
-    def train_all_models(self, X, y):
-        """Train all models using GridSearchCV"""
-        results = {}
+    def _model_input(self, X, urls, uses_ngrams):
+        """Return the feature matrix for a model, adding n-gram columns if it uses them"""
+        if not uses_ngrams:
+            return X
+        if urls is None:
+            raise ValueError("URLs are required for models that use n-gram features")
+        return self.ngram_stage.combine(X, urls)
+
+    def train_all_models(self, X, y, urls=None):
+        """Train all models with a cached, parallel grid search
+
+        Fold fits of all models are scheduled together on one joblib process
+        pool, so random forest and logistic regression are searched
+        concurrently. Fold scores are persisted per (dataset fingerprint,
+        model, parameter combination); combinations scored in an earlier run
+        are not fitted again.
+
+        If an n-gram stage is configured, models marked with 'sparse_ngrams'
+        are trained on the dense features plus hashed n-grams of ``urls``.
+        """
+        X = X.to_numpy() if hasattr(X, 'to_numpy') else X
+        y = np.asarray(y)
+        folds = list(StratifiedKFold(n_splits=self.cv).split(np.zeros(len(y)), y))
+        # Foldovi ovise samo o y (u otisku) i ovim postavkama
+        cv_settings = {'splitter': 'StratifiedKFold', 'n_splits': self.cv, 'shuffle': False}
+        
+        def score_key(name, params):
+            return search_key(self.param_grids[name]['model'], params, cv_settings)
+        
+        # Pripremimo ulaze, otiske i popis fitova koji još nisu u cacheu
+        searches = {}
+        tasks = []
         for name, config in self.param_grids.items():
-            print(f"\nTraining {name} with GridSearchCV...")
-            
-            # Dodali verbose za praćenje napretka
-            grid_search = GridSearchCV(
-                config['model'],
-                config['params'],
-                cv=5,
-                scoring='f1_weighted',
-                n_jobs=-1,
-                verbose=1
-            )
-            
-            # Dodali try-except za hvatanje upozorenja
-            import warnings
-            with warnings.catch_warnings():
-                warnings.filterwarnings('ignore')
-                grid_search.fit(X, y)
-            
-            # Store the best model
-            self.param_grids[name]['best_model'] = grid_search.best_estimator_
-            
-            # Calculate cross-validation score for best model
-            cv_scores = cross_val_score(
-                grid_search.best_estimator_,
-                X, y,
-                cv=5,
-                scoring='f1_weighted'
+            uses_ngrams = bool(config.get('sparse_ngrams')) and self.ngram_stage is not None
+            X_model = self._model_input(X, urls, uses_ngrams)
+            fingerprint = dataset_fingerprint(X_model, y)
+            cached = self.search_cache.load(fingerprint).get(name, {})
+            candidates = list(ParameterGrid(config['params']))
+            searches[name] = {
+                'X': X_model, 'uses_ngrams': uses_ngrams, 'fingerprint': fingerprint,
+                'candidates': candidates, 'scores': dict(cached)
+            }
+            missing = [params for params in candidates if score_key(name, params) not in cached]
+            print(f"{name}: {len(candidates)} candidates, {len(candidates) - len(missing)} cached")
+            for params in missing:
+                for fold, (train, test) in enumerate(folds):
+                    tasks.append((name, params, fold, train, test))
+        
+        if tasks:
+            print(f"\nFitting {len(tasks)} folds across {len(searches)} models...")
+            scores = joblib.Parallel(n_jobs=self.n_jobs, verbose=1)(
+                joblib.delayed(_fit_and_score)(
+                    self.param_grids[name]['model'], params, searches[name]['X'], y, train, test)
+                for name, params, fold, train, test in tasks
             )
-            
+            new_scores = {}
+            for (name, params, fold, _, _), score in zip(tasks, scores):
+                fold_scores = new_scores.setdefault(name, {}).setdefault(score_key(name, params), [None] * len(folds))
+                fold_scores[fold] = float(score)
+            for name, model_scores in new_scores.items():
+                searches[name]['scores'].update(model_scores)
+                self.search_cache.save(searches[name]['fingerprint'], {name: model_scores})
+        
+        # Najbolja kombinacija po modelu i refit na svim podacima (paralelno)
+        results = {}
+        for name, search in searches.items():
+            best_params = max(search['candidates'],
+                              key=lambda params: np.mean(search['scores'][score_key(name, params)]))
+            cv_scores = np.array(search['scores'][score_key(name, best_params)])
             results[name] = {
                 'cv_mean': cv_scores.mean(),
                 'cv_std': cv_scores.std(),
-                'best_params': grid_search.best_params_
+                'best_params': best_params
             }
-            
-            print(f"Best parameters: {grid_search.best_params_}")
+            print(f"\n{name} best parameters: {best_params}")
             print(f"Best CV score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
         
+        models = joblib.Parallel(n_jobs=1 if self.n_jobs == 1 else len(searches))(
+            joblib.delayed(_refit)(self.param_grids[name]['model'], results[name]['best_params'],
+                                   search['X'], y)
+            for name, search in searches.items()
+        )
+        for (name, search), model in zip(searches.items(), models):
+            self.param_grids[name]['best_model'] = model
+            self.param_grids[name]['uses_ngrams'] = search['uses_ngrams']
+        
         return results
     
     def select_best_model(self, results):
@@ -85,27 +162,187 @@ def select_best_model(self, results):
         best_model_name = max(results.items(), key=lambda x: x[1]['cv_mean'])[0]
         self.current_model_name = best_model_name
         self.current_model = self.param_grids[best_model_name]['best_model']
+        self.current_uses_ngrams = self.param_grids[best_model_name].get('uses_ngrams', False)
         
         print(f"\nBest model: {best_model_name}")
         print(f"Best parameters: {results[best_model_name]['best_params']}")
         return best_model_name
 
-    def evaluate(self, X_test, y_test):
-        """Evaluate the current model"""
+    def predict(self, X, urls=None):
+        """Predict with the current model (urls are needed if it uses n-grams)"""
         if self.current_model is None:
             raise ValueError("No model selected. Train models first.")
-        predictions = self.current_model.predict(X_test)
+        return self.current_model.predict(self._model_input(X, urls, self.current_uses_ngrams))
+
+    def evaluate(self, X_test, y_test, urls=None):
+        """Evaluate the current model"""
+        predictions = self.predict(X_test, urls)
         return {
             'classification_report': classification_report(y_test, predictions),
             'confusion_matrix': confusion_matrix(y_test, predictions)
         }
     
+    def distill(self, X_train, X_calibration, student=None, max_disagreement=0.005):
+        """Distill the current model into a small student and wrap both in a cascade.
+
+        The student (by default a 20-tree, depth-8 regression forest) is fit
+        on the teacher's malicious-class probability for X_train. Escalation
+        thresholds are chosen on X_calibration, which must not be used for
+        fitting. The cascade becomes the current model.
+        """
+        if self.current_model is None:
+            raise ValueError("No model selected. Train models first.")
+        if self.current_uses_ngrams:
+            raise ValueError("Distillation needs a model trained on the dense features only.")
+        teacher = self.current_model
+        column = list(teacher.classes_).index(1)
+        student = student or RandomForestRegressor(
+            n_estimators=20, max_depth=8, random_state=42
+        )
+        student.fit(X_train, teacher.predict_proba(X_train)[:, column])
+        
+        student_proba = student.predict(X_calibration)
+        low, high = choose_thresholds(student_proba, teacher.predict(X_calibration), max_disagreement)
+        print(f"Cascade thresholds: escalate if {low:.3f} < student score < {high:.3f}")
+        
+        self.teacher_model = teacher
+        self.current_model = CascadeClassifier(student, teacher, low, high)
+        return self.current_model
+
+    def evaluate_cascade(self, X_test, y_test):
+        """Report escalation rate, agreement, F1 and latency of the cascade vs. its teacher"""
+        if not isinstance(self.current_model, CascadeClassifier):
+            raise ValueError("No cascade model. Call distill() first.")
+        cascade = self.current_model
+        X_test = np.asarray(X_test)
+        student_proba = cascade.student.predict(X_test)
+        teacher_predictions = cascade.teacher.predict(X_test)
+        cascade_predictions = cascade.predict(X_test)
+        
+        teacher_latency = mean_latency_ms(cascade.teacher, X_test)
+        cascade_latency = mean_latency_ms(cascade, X_test)
+        report = {
+            'escalation_rate': float(cascade.escalation_mask(student_proba).mean()),
+            'agreement_with_teacher': float((cascade_predictions == teacher_predictions).mean()),
+            'teacher_f1': f1_score(y_test, teacher_predictions, average='weighted'),
+            'cascade_f1': f1_score(y_test, cascade_predictions, average='weighted'),
+            'teacher_latency_ms': teacher_latency,
+            'cascade_latency_ms': cascade_latency,
+            'latency_saving': 1 - cascade_latency / teacher_latency if teacher_latency else 0.0
+        }
+        
+        print(f"Escalation rate: {report['escalation_rate']:.1%}")
+        print(f"Agreement with teacher: {report['agreement_with_teacher']:.2%}")
+        print(f"F1 (weighted): teacher {report['teacher_f1']:.4f}, cascade {report['cascade_f1']:.4f}")
+        print(f"Single-URL latency: teacher {teacher_latency:.2f} ms, cascade {cascade_latency:.2f} ms "
+              f"({report['latency_saving']:.0%} saved)")
+        return report
+
+    def compress(self, X_holdout, y_holdout, max_f1_drop=0.005,
+                 settings=(('uint8', 0.05), ('uint8', 0.01), ('uint8', 0.0), ('float16', 0.0))):
+        """Replace the random forest with a pruned, quantized CompactForest.
+
+        For each (threshold dtype, subtree prune tolerance) setting, from most
+        to least aggressive (see CompactForest.from_forest), the smallest
+        prefix of trees whose weighted F1 on the held-out set is within
+        ``max_f1_drop`` of the original forest is kept. If no setting meets the budget the original model is kept.
+        Works on a plain forest or on the full model inside a cascade.
+        Returns the compact forest, or None if it was rejected.
+        """
+        cascade = self.current_model if isinstance(self.current_model, CascadeClassifier) else None
+        forest = cascade.teacher if cascade else self.current_model
+        if not isinstance(forest, RandomForestClassifier):
+            raise ValueError("Compression needs a RandomForestClassifier as the current model.")
+        y_holdout = np.asarray(y_holdout)
+        baseline_f1 = f1_score(y_holdout, forest.predict(X_holdout), average='weighted')
+        
+        compact = None
+        for threshold_dtype, prune_tolerance in settings:
+            candidate = CompactForest.from_forest(forest, threshold_dtype, prune_tolerance)
+            # F1 za svaki prefiks stabala iz jedne evaluacije svih stabala
+            tree_proba = candidate.tree_proba(X_holdout)
+            prefix_proba = np.cumsum(tree_proba, axis=1) / np.arange(1, tree_proba.shape[1] + 1)
+            for n_trees in range(1, candidate.n_estimators + 1):
+                predictions = candidate.predict_from_malicious_proba(prefix_proba[:, n_trees - 1])
+                drop = baseline_f1 - f1_score(y_holdout, predictions, average='weighted')
+                if drop <= max_f1_drop:
+                    compact = candidate.truncate(n_trees)
+                    break
+            if compact is not None:
+                print(f"Compressed forest: {threshold_dtype} thresholds, prune tolerance {prune_tolerance}, "
+                      f"{compact.n_estimators}/{forest.n_estimators} trees, F1 drop {drop:.4f}")
+                break
+        
+        if compact is None:
+            print(f"No compression setting within F1 budget {max_f1_drop}; keeping the original forest")
+            return None
+        
+        self.uncompressed_model = forest
+        if cascade:
+            cascade.teacher = compact
+        else:
+            self.current_model = compact
+        return compact
+
+    def compression_report(self, X_test, y_test):
+        """Compare artifact size, load time, latency and F1 of the compressed vs. original forest"""
+        original = self.uncompressed_model
+        compact = self.current_model.teacher if isinstance(self.current_model, CascadeClassifier) else self.current_model
+        X_test = np.asarray(X_test)
+        report = {}
+        for label, model in (('original', original), ('compressed', compact)):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, 'model.joblib')
+                joblib.dump(model, path)
+                size = os.path.getsize(path)
+                start = time.perf_counter()
+                joblib.load(path)
+                load_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            predictions = model.predict(X_test)
+            batch_ms = (time.perf_counter() - start) * 1000
+            report[label] = {
+                'size_mb': size / 1024 ** 2,
+                'load_seconds': load_seconds,
+                'latency_ms': mean_latency_ms(model, X_test),
+                'batch_ms': batch_ms,
+                'f1': f1_score(y_test, predictions, average='weighted')
+            }
+        
+        for label, row in report.items():
+            print(f"{label:>10}: {row['size_mb']:.2f} MB, load {row['load_seconds']:.3f}s, "
+                  f"single-URL {row['latency_ms']:.2f} ms, batch of {len(X_test)} {row['batch_ms']:.0f} ms, "
+                  f"F1 {row['f1']:.4f}")
+        print(f"F1 change: {report['compressed']['f1'] - report['original']['f1']:+.4f}")
+        return report
+
+    def save_evaluation(self, evaluation, feature_names, filename='evaluation.json'):
+        """Save the test confusion matrix and feature importances next to the model.
+
+        The stats snapshot job (src/snapshot.py) renders its charts from this
+        file, so the web process never needs the test set or matplotlib.
+        """
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+        importances = getattr(self.current_model, 'feature_importances_', None)
+        data = {
+            'model': self.current_model_name,
+            'confusion_matrix': np.asarray(evaluation['confusion_matrix']).tolist(),
+            'feature_names': list(feature_names),
+            'feature_importances': importances.tolist() if importances is not None else None
+        }
+        with open(os.path.join(self.model_path, filename), 'w') as f:
+            json.dump(data, f, indent=1)
+    
     def save_model(self, filename):
         """Save the current model"""
         if self.current_model is None:
             raise ValueError("No model selected. Train models first.")
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
+        if self.current_uses_ngrams:
+            # Stage je bez stanja - spremamo ga uz model da se zna kako su građeni stupci
+            self.current_model.ngram_stage_ = self.ngram_stage
         joblib.dump(self.current_model, os.path.join(self.model_path, filename))
         
     def load_model(self, filename):
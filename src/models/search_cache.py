@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+
+def dataset_fingerprint(X, y):
+    """Stable hash of a feature matrix (dense or sparse) and its labels"""
+    digest = hashlib.sha1()
+    if sparse.issparse(X):
+        X = X.tocsr()
+        parts = [X.data, X.indices, X.indptr]
+    else:
+        parts = [np.ascontiguousarray(X)]
+    digest.update(repr((X.shape, str(X.dtype))).encode())
+    for part in parts + [np.ascontiguousarray(y)]:
+        digest.update(part.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def param_key(params):
+    """Canonical string key for a parameter combination"""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def search_key(estimator, params, cv):
+    """Cache key of one grid point: estimator class, all effective parameters and the CV scheme.
+
+    Base-estimator settings outside the grid (e.g. random_state) and the fold
+    settings change the scores, so they are part of the key too.
+    """
+    return param_key({
+        'estimator': type(estimator).__name__,
+        'params': dict(estimator.get_params(), **params),
+        'cv': cv
+    })
+
+
+class SearchCache:
+    """Persisted cross-validation fold scores.
+
+    Scores are stored per dataset fingerprint in ``<directory>/<fingerprint>.json``
+    as ``{model_name: {search_key: [fold scores]}}`` so a repeated or extended
+    grid search only evaluates parameter combinations it has not seen.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, fingerprint):
+        return os.path.join(self.directory, f"{fingerprint}.json")
+
+    def load(self, fingerprint):
+        path = self._path(fingerprint)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, fingerprint, scores):
+        """Merge scores into the stored results for fingerprint"""
+        os.makedirs(self.directory, exist_ok=True)
+        stored = self.load(fingerprint)
+        for model_name, model_scores in scores.items():
+            stored.setdefault(model_name, {}).update(model_scores)
+        tmp_path = self._path(fingerprint) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f, indent=1)
+        os.replace(tmp_path, self._path(fingerprint))
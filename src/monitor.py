@@ -0,0 +1,102 @@
+"""Feature drift and throughput report over the url_checks history.
+
+Compares the feature vectors stored by all web workers against the profile
+that train.py saved with the model:
+    python src/monitor.py                         # last 12 x 5 minutes, once
+    python src/monitor.py --window-minutes 60 --windows 24 --follow --interval 60
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+from src.db.database import Database, CHECK_COLUMNS
+from src.models.drift_monitor import DriftMonitor, load_profile
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def check_source(check):
+    # Redovi spremljeni prije stupca source nemaju izvor (ni histograme)
+    return check['source'] or 'unknown'
+
+
+def observe_checks(db, monitor, since_id, chunk_size=50000):
+    """Feed new url_checks rows (id > since_id) to the monitor; returns the last id read"""
+    for rows in db.iter_checks(chunk_size, since_id=since_id):
+        for row in rows:
+            check = dict(zip(CHECK_COLUMNS, row))
+            if not check['check_date']:
+                continue
+            when = datetime.strptime(check['check_date'][:19], DATE_FORMAT).replace(tzinfo=timezone.utc)
+            # Kao /monitor: histogrami samo za vektore koje je model stvarno bodovao
+            # (ponovljeni URL-ovi iz indeksa i cachea nose kopirane značajke)
+            source = check_source(check)
+            features = json.loads(check['features']) if source == 'model' and check['features'] else None
+            monitor.observe(features, bool(check['is_malicious']), source, now=when.timestamp())
+        since_id = rows[-1][0]
+    return since_id
+
+
+def print_report(report, top=10):
+    print(f"{report['checks']} checks in the last {report['elapsed_seconds'] / 60:.1f} min "
+          f"({report['checks_per_second']:.3f}/s), malicious rate {report['malicious_rate']} "
+          f"(reference {report['reference_malicious_rate']})")
+    for source, item in report['sources'].items():
+        print(f"  {source:10s} {item['checks']:8d} checks  {item['checks_per_second']:.3f}/s")
+    scored = sorted(((item['psi'], name) for name, item in report['features'].items() if item['psi'] is not None),
+                    reverse=True)
+    if not scored:
+        print("Not enough model-scored checks for drift scores")
+        return
+    print("Feature drift (PSI, highest first):")
+    for score, name in scored[:top]:
+        flag = '  DRIFT' if name in report['drifted'] else ''
+        print(f"  {name:28s} {score:.4f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature drift and throughput of production checks")
+    parser.add_argument('--db', default='url_checks.db', help="SQLite database with url_checks")
+    parser.add_argument('--profile', default=os.path.join(project_root, 'models', 'feature_profile.json'),
+                        help="Reference feature profile written by train.py")
+    parser.add_argument('--window-minutes', type=float, default=5)
+    parser.add_argument('--windows', type=int, default=12, help="Number of rolling windows kept")
+    parser.add_argument('--min-count', type=int, default=100, help="Observations needed for a drift score")
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    parser.add_argument('--follow', action='store_true', help="Keep reading new checks")
+    parser.add_argument('--interval', type=float, default=60, help="Seconds between reports with --follow")
+    args = parser.parse_args(argv)
+
+    profile = None
+    if os.path.exists(args.profile):
+        profile = load_profile(args.profile)
+    else:
+        print(f"No feature profile at {args.profile} (run train.py); reporting throughput only")
+
+    window_seconds = args.window_minutes * 60
+    monitor = DriftMonitor(profile, window_seconds=window_seconds, windows=args.windows,
+                           min_count=args.min_count)
+    db = Database(args.db)
+    # Čitamo samo redove koji stanu u prozore
+    since = (datetime.utcnow() - timedelta(seconds=window_seconds * args.windows)).strftime(DATE_FORMAT)
+    last_id = db.first_check_id(since)
+    while True:
+        last_id = observe_checks(db, monitor, last_id)
+        report = monitor.report()
+        if args.json:
+            print(json.dumps(report, indent=1))
+        else:
+            print_report(report)
+        if not args.follow:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Retention job for url_checks: archive old rows, expire archives, compact the file.
+
+Meant to run from cron, e.g. nightly:
+    python src/retention.py --hot-days 90 --archive-dir /srv/archive --keep-archive-months 24
+"""
+import argparse
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+from src.db.database import Database
+from src.db.retention import RetentionManager
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive, expire and compact the url_checks history")
+    parser.add_argument('--db', default='url_checks.db', help="SQLite database with url_checks")
+    parser.add_argument('--hot-days', type=int, default=90,
+                        help="Days of raw rows kept in url_checks (keep >= the verdict index max age)")
+    parser.add_argument('--archive-dir', default=None,
+                        help="Write monthly archives as separate files here (default: tables in --db)")
+    parser.add_argument('--keep-archive-months', type=int, default=None,
+                        help="Delete raw archives older than this many months (daily rollups stay)")
+    parser.add_argument('--batch-size', type=int, default=50000, help="Rows moved per transaction")
+    parser.add_argument('--no-compact', action='store_true', help="Skip the incremental vacuum step")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="Convert an existing database once (full VACUUM, blocks writers)")
+    parser.add_argument('--vacuum-into', default=None, help="Also write a compacted copy to this path")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"ERROR: Database not found: {args.db}")
+        return 1
+
+    manager = RetentionManager(Database(args.db), hot_days=args.hot_days, archive_dir=args.archive_dir,
+                               keep_archive_months=args.keep_archive_months, batch_size=args.batch_size)
+    if args.enable_incremental_vacuum:
+        manager.enable_incremental_vacuum()
+    manager.apply(compact=not args.no_compact)
+    if args.vacuum_into:
+        manager.vacuum_into(args.vacuum_into)
+        print(f"Compacted copy written to {args.vacuum_into}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
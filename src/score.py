@@ -0,0 +1,237 @@
+"""Offline batch scoring of URL files.
+
+Example:
+    python src/score.py proxy_urls.txt verdicts.csv --workers 8
+    python src/score.py urls.csv verdicts.parquet --url-column url --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+from src.features.feature_extractor import FeatureExtractor, feature_row
+from src.features.heuristics import HEURISTIC_CONFIDENCE, is_known_safe, has_immediate_flags
+from src.features.url_parser import ParsedURL
+from src.models.model_server import ModelServer, model_filename_from_env
+
+OUTPUT_COLUMNS = ['url', 'verdict', 'is_malicious', 'malicious_probability', 'source']
+
+# Stanje po worker procesu (postavlja ga _init_worker)
+_extractor = None
+_server = None
+
+
+def _init_worker(model_file):
+    global _extractor, _server
+    _extractor = FeatureExtractor()
+    _server = ModelServer(os.path.dirname(model_file), os.path.basename(model_file))
+    _server.load()
+
+
+def score_batch(urls):
+    """Score a batch of URLs; the model runs once per batch on all undecided URLs"""
+    rows = []
+    model_rows = []
+    model_features = []
+    model_urls = []
+    for url in urls:
+        # Bez lru_cache-a: u batch obradi se URL-ovi rijetko ponavljaju
+        try:
+            parsed = ParsedURL(url)
+        except ValueError:
+            rows.append([url, 'invalid', None, None, 'error'])
+            continue
+        features = _extractor.lazy_features(parsed)
+        if is_known_safe(parsed):
+            rows.append([url, 'safe', False, round(1 - HEURISTIC_CONFIDENCE, 6), 'whitelist'])
+        elif has_immediate_flags(parsed, features):
+            rows.append([url, 'malicious', True, HEURISTIC_CONFIDENCE, 'heuristic'])
+        else:
+            row = [url, None, None, None, 'model']
+            rows.append(row)
+            model_rows.append(row)
+            model_features.append(feature_row(features))
+            model_urls.append(url)
+
+    if model_features:
+        probabilities = _server.malicious_proba(model_features, urls=model_urls)
+        for row, probability in zip(model_rows, probabilities):
+            is_malicious = bool(probability >= 0.5)
+            row[1] = 'malicious' if is_malicious else 'safe'
+            row[2] = is_malicious
+            row[3] = round(float(probability), 6)
+    return rows
+
+
+def read_urls(input_path, url_column='url', skip=0):
+    """Stream URLs from a CSV (with header) or newline-delimited file"""
+    with open(input_path, newline='', encoding='utf-8', errors='replace') as f:
+        if input_path.lower().endswith('.csv'):
+            urls = (row[url_column] for row in csv.DictReader(f))
+        else:
+            urls = (line.strip() for line in f)
+        urls = (url for url in urls if url)
+        yield from islice(urls, skip, None)
+
+
+def iter_batches(urls, batch_size):
+    iterator = iter(urls)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class CsvResultWriter:
+    def __init__(self, path, append=False):
+        exists = append and os.path.exists(path)
+        self.file = open(path, 'a' if exists else 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if not exists:
+            self.writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """Writes one row group per batch; a resumed run writes a new part file"""
+
+    def __init__(self, path, append=False, offset=0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        if append and offset:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.part-{offset}{ext}"
+        self.pa = pa
+        self.schema = pa.schema([
+            ('url', pa.string()),
+            ('verdict', pa.string()),
+            ('is_malicious', pa.bool_()),
+            ('malicious_probability', pa.float32()),
+            ('source', pa.string())
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        table = self.pa.Table.from_arrays(
+            [self.pa.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+            schema=self.schema
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f).get('offset', 0)
+
+
+def save_checkpoint(path, offset):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'offset': offset}, f)
+    os.replace(tmp_path, path)
+
+
+def score_file(input_path, output_path, model_file, batch_size=1000, workers=None,
+               url_column='url', checkpoint_path=None, resume=False):
+    """Score all URLs in input_path and write verdicts to output_path.
+
+    Batches are written in input order and at most ``2 * workers`` batches are
+    in flight, so memory stays bounded regardless of the input size. After each
+    written batch the number of consumed input records is stored in the
+    checkpoint file, which ``resume=True`` uses to skip already scored URLs.
+    Returns the number of URLs scored in this run.
+    """
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+    offset = load_checkpoint(checkpoint_path) if resume else 0
+    if offset:
+        print(f"Resuming from offset {offset}")
+
+    if output_path.lower().endswith('.parquet'):
+        writer = ParquetResultWriter(output_path, append=resume, offset=offset)
+    else:
+        writer = CsvResultWriter(output_path, append=resume)
+
+    batches = iter_batches(read_urls(input_path, url_column, skip=offset), batch_size)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    scored = 0
+    start = time.perf_counter()
+
+    def flush(rows):
+        nonlocal scored
+        writer.write(rows)
+        scored += len(rows)
+        save_checkpoint(checkpoint_path, offset + scored)
+
+    try:
+        if workers <= 1:
+            _init_worker(model_file)
+            for batch in batches:
+                flush(score_batch(batch))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(model_file,)) as pool:
+                pending = deque()
+                for batch in batches:
+                    pending.append(pool.submit(score_batch, batch))
+                    if len(pending) >= 2 * workers:
+                        flush(pending.popleft().result())
+                while pending:
+                    flush(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = scored / elapsed if elapsed > 0 else 0
+    print(f"Scored {scored} URLs in {elapsed:.1f}s ({rate:.0f} URLs/s)")
+    return scored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file of URLs with the trained model")
+    parser.add_argument('input', help="CSV file with a URL column or newline-delimited text file")
+    parser.add_argument('output', help="Output file (.csv or .parquet)")
+    parser.add_argument('--model', default=os.path.join(project_root, 'models', model_filename_from_env()),
+                        help="Path to the trained model (default: models/$URL_DETECTOR_MODEL)")
+    parser.add_argument('--url-column', default='url', help="URL column name for CSV input")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the last checkpoint offset")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"ERROR: Model file not found: {args.model}")
+        return 1
+
+    score_file(args.input, args.output, args.model, batch_size=args.batch_size,
+               workers=args.workers, url_column=args.url_column,
+               checkpoint_path=args.checkpoint, resume=args.resume)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
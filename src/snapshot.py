@@ -0,0 +1,47 @@
+"""Background job that precomputes the /stats dashboard (aggregates and charts).
+
+Run it next to the web workers, e.g. from cron or as a long-running process:
+    python src/snapshot.py                  # write one snapshot
+    python src/snapshot.py --interval 300   # refresh every 5 minutes
+"""
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+from src.db.database import Database
+from src.visualization.snapshot import build_snapshot
+
+
+def default_snapshot_dir():
+    return os.environ.get('URL_DETECTOR_SNAPSHOT_DIR', os.path.join(project_root, 'snapshots'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write versioned stats snapshots for the web dashboard")
+    parser.add_argument('--db', default='url_checks.db', help="SQLite database with url_checks")
+    parser.add_argument('--output-dir', default=default_snapshot_dir(),
+                        help="Snapshot directory served by the web app (URL_DETECTOR_SNAPSHOT_DIR)")
+    parser.add_argument('--evaluation', default=os.path.join(project_root, 'models', 'evaluation.json'),
+                        help="Evaluation data written by train.py (confusion matrix, feature importances)")
+    parser.add_argument('--interval', type=float, default=None,
+                        help="Seconds between snapshots; without it a single snapshot is written")
+    parser.add_argument('--keep', type=int, default=2, help="Snapshot versions kept on disk")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    while True:
+        start = time.perf_counter()
+        manifest = build_snapshot(db, args.output_dir, args.evaluation, keep=args.keep)
+        print(f"Snapshot {manifest['version']} ({manifest['generated_at']}) "
+              f"ready in {time.perf_counter() - start:.2f}s")
+        if args.interval is None:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
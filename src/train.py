@@ -1,66 +1,117 @@
-from data.data_loader import DataLoader
-from features.feature_extractor import FeatureExtractor
-from models.model_trainer import ModelTrainer
-from visualization.visualizer import ResultVisualizer
-from tqdm import tqdm
-import pandas as pd
 import os
-from sklearn.utils import resample
+import sys
+import argparse
+# Uvozimo kroz paket src da spremljeni modeli (pickle) budu učitljivi iz web aplikacije
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from src.data.data_loader import DataLoader
+from src.features.feature_extractor import FeatureExtractor, feature_row
+from src.features.heuristics import is_known_safe, has_immediate_flags
+from src.features.ngram_features import HashedNgramFeatures
+from src.models.model_trainer import ModelTrainer
+from src.models.model_server import DEFAULT_MODEL_FILENAME
+from src.models.drift_monitor import build_profile, save_profile
+from src.visualization.visualizer import ResultVisualizer
+from tqdm import tqdm
+import numpy as np
 from sklearn.model_selection import train_test_split
 import warnings
 
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vraća KB, macOS bajtove
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def report_memory(stage):
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"[memory] {stage}: peak RSS {peak:.1f} MB")
+
 def create_feature_matrix(urls):
-    """Create feature matrix from URLs"""
+    """Create a preallocated float32 feature matrix from URLs.
+
+    Returns (matrix, feature_names); rows follow the order of ``urls``.
+    """
     extractor = FeatureExtractor()
-    features = []
+    feature_names = extractor._get_feature_names()  # isti redoslijed kao feature_row() u app.py i score.py
+    matrix = np.zeros((len(urls), len(feature_names)), dtype=np.float32)
     
     print("\nExtracting features...")
-    for url in tqdm(urls, desc="Processing URLs"):
+    for i, url in enumerate(tqdm(urls, desc="Processing URLs")):
         try:
-            features.append(extractor.extract_features(url))
+            features = extractor.extract_features(url)
         except Exception as e:
             # U slučaju greške, dodaj default vrijednosti
-            features.append(extractor._get_default_features())
+            features = extractor._get_default_features()
+        matrix[i] = feature_row(features)
     
-    return pd.DataFrame(features)
+    return matrix, feature_names
 
-def balance_dataset(df):
-    """Balance dataset using undersampling but maintain reasonable size"""
-    df_majority = df[df['label'] == 0]
-    df_minority = df[df['label'] == 1]
+def model_scored_mask(urls, X, feature_names):
+    """Rows that would reach the model when served (not whitelisted, no immediate flags).
+
+    Only these vectors are counted by the drift monitor, so its reference
+    profile must come from the same population.
+    """
+    mask = np.zeros(len(urls), dtype=bool)
+    for i, url in enumerate(urls):
+        features = dict(zip(feature_names, X[i].tolist()))
+        mask[i] = not is_known_safe(url) and not has_immediate_flags(url, features)
+    return mask
+
+def balance_indices(labels, random_state=42):
+    """Balance classes by returning row indices instead of copying rows.
+
+    The majority class (0) is downsampled to 75% of its size and the minority
+    class (1) is upsampled with replacement to the same size; the combined
+    index array is shuffled.
+    """
+    rng = np.random.RandomState(random_state)
+    majority = np.flatnonzero(labels == 0)
+    minority = np.flatnonzero(labels == 1)
     
     # Uzimamo veći uzorak - 75% većinske klase
-    target_size = int(len(df_majority) * 0.75)
-    
-    # Downsample majority class
-    df_majority_downsampled = resample(
-        df_majority,
-        replace=False,
-        n_samples=target_size,
-        random_state=42
-    )
+    target_size = int(len(majority) * 0.75)
     
-    # Upsample minority class
-    df_minority_upsampled = resample(
-        df_minority,
-        replace=True,
-        n_samples=target_size,
-        random_state=42
-    )
-    
-    # Combine and shuffle
-    balanced_df = pd.concat([df_majority_downsampled, df_minority_upsampled])
-    balanced_df = balanced_df.sample(frac=1, random_state=42).reset_index(drop=True)
-    
-    return balanced_df
+    indices = np.concatenate([
+        rng.choice(majority, size=target_size, replace=False),
+        rng.choice(minority, size=target_size, replace=True)
+    ])
+    rng.shuffle(indices)
+    return indices
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train malicious URL detection models")
+    parser.add_argument('--ngrams', action='store_true',
+                        help="Add hashed character n-gram features for logistic regression")
+    parser.add_argument('--ngram-range', type=int, nargs=2, default=[3, 5], metavar=('MIN', 'MAX'))
+    parser.add_argument('--ngram-features', type=int, default=2 ** 18,
+                        help="Hash width (number of n-gram columns)")
+    parser.add_argument('--distill', action='store_true',
+                        help="Distill the best model into a fast cascade (student + full model)")
+    parser.add_argument('--max-disagreement', type=float, default=0.005,
+                        help="Max share of student answers that may disagree with the full model")
+    parser.add_argument('--compress', action='store_true',
+                        help="Replace the random forest with a pruned, quantized compact forest")
+    parser.add_argument('--max-f1-drop', type=float, default=0.005,
+                        help="Max weighted F1 loss on the validation set allowed by compression")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    ngram_stage = None
+    if args.ngrams:
+        ngram_stage = HashedNgramFeatures(tuple(args.ngram_range), args.ngram_features)
 
-def main():
     # Ignore convergence warnings
     warnings.filterwarnings('ignore', category=UserWarning)
     
     # Setup paths
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(current_dir)
     data_path = os.path.join(project_root, 'data', 'raw', 'malicious_urls.csv')
     
     # Povećajte veličinu uzorka na 100,000
@@ -68,57 +119,106 @@ def main():
     loader = DataLoader(data_path, sample_size=sample_size)
     data = loader.load_data()
     
+    report_memory("data loaded")
+    
     if data is not None:
+        # Labele i URL-ovi kao numpy nizovi (poravnati po poziciji, ne po indeksu)
+        labels = data['label'].to_numpy(dtype=np.int8)
+        urls = data['url'].to_numpy()
+        del data
+        
         # Extract features
-        features_df = create_feature_matrix(data['url'])
-        features_df['label'] = data['label']  # Add label column to features
+        X, feature_names = create_feature_matrix(urls)
+        print(f"Feature matrix: {X.shape} ({X.nbytes / 1024 ** 2:.1f} MB)")
+        report_memory("features extracted")
         
         # Balance dataset
         print("\nBalancing dataset...")
-        balanced_df = balance_dataset(features_df)
-        print(f"Balanced dataset shape: {balanced_df.shape}")
+        balanced_idx = balance_indices(labels)
+        print(f"Balanced dataset size: {len(balanced_idx)}")
         
         # Print class distribution
         print("\nClass distribution in balanced dataset:")
-        print(f"- Class 0 (benign): {sum(balanced_df['label'] == 0)}")
-        print(f"- Class 1 (malicious): {sum(balanced_df['label'] == 1)}")
+        print(f"- Class 0 (benign): {int(np.sum(labels[balanced_idx] == 0))}")
+        print(f"- Class 1 (malicious): {int(np.sum(labels[balanced_idx] == 1))}")
         
-        # Split into train, validation, and test
-        X = balanced_df.drop('label', axis=1)
-        y = balanced_df['label']
+        # Split into train, validation, and test (samo indeksi)
+        temp_idx, test_idx = train_test_split(
+            balanced_idx, test_size=0.2, random_state=42, stratify=labels[balanced_idx])
+        train_idx, val_idx = train_test_split(
+            temp_idx, test_size=0.2, random_state=42, stratify=labels[temp_idx])
         
-        X_temp, X_test, y_temp, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-        X_train, X_val, y_train, y_val = train_test_split(X_temp, y_temp, test_size=0.2, random_state=42, stratify=y_temp)
+        X_train, y_train = X[train_idx], labels[train_idx]
+        X_test, y_test = X[test_idx], labels[test_idx]
+        # Validacijski skup: kalibracija praga kaskade i F1 budžet kompresije
+        X_val = X[val_idx] if args.distill or args.compress else None
+        y_val = labels[val_idx]
+        urls_train, urls_test = urls[train_idx].tolist(), urls[test_idx].tolist()
+        # Referentni profil značajki na nebalansiranom uzorku (razdioba kao u produkciji),
+        # samo redovi koje bi model bodovao - whitelist i heuristike ne ulaze u histograme
+        scored = model_scored_mask(urls, X, feature_names)
+        print(f"Feature profile: {int(scored.sum())} of {len(scored)} URLs reach the model")
+        profile = build_profile(X[scored], feature_names, labels[scored])
+        del X
         
         print(f"\nTrain set shape: {X_train.shape}")
-        print(f"Validation set shape: {X_val.shape}")
+        print(f"Validation set shape: {(len(val_idx), X_train.shape[1])}")
         print(f"Test set shape: {X_test.shape}")
+        report_memory("train/test split")
         
         # Train and compare models
         print("\nTraining models...")
-        trainer = ModelTrainer()
-        results = trainer.train_all_models(X_train, y_train)
+        trainer = ModelTrainer(ngram_stage=ngram_stage)
+        results = trainer.train_all_models(X_train, y_train, urls=urls_train)
+        report_memory("models trained")
         
         # Select best model
         best_model = trainer.select_best_model(results)
         
         # Evaluate best model
         print("\nEvaluating best model...")
-        evaluation = trainer.evaluate(X_test, y_test)
+        evaluation = trainer.evaluate(X_test, y_test, urls=urls_test)
         print("\nClassification Report:")
         print(evaluation['classification_report'])
         
         # Visualize results
         print("\nGenerating visualizations...")
         visualizer = ResultVisualizer()
-        predictions = trainer.current_model.predict(X_test)
+        predictions = trainer.predict(X_test, urls=urls_test)
         visualizer.plot_confusion_matrix(y_test, predictions)
         if hasattr(trainer.current_model, 'feature_importances_'):
-            visualizer.plot_feature_importance(trainer.current_model, X_train.columns)
+            visualizer.plot_feature_importance(trainer.current_model, feature_names)
+        # Podaci za grafove na /stats (crta ih src/snapshot.py)
+        trainer.save_evaluation(evaluation, feature_names)
+        # Referenca za praćenje pomaka značajki (src/monitor.py i /monitor)
+        save_profile(profile, os.path.join(trainer.model_path, 'feature_profile.json'))
+        
+        # Compression of the forest (the cascade then distills from the compact forest)
+        if args.compress:
+            if best_model != 'random_forest':
+                print(f"\nSkipping compression: best model is {best_model}")
+            else:
+                print("\nCompressing random forest...")
+                if trainer.compress(X_val, y_val, max_f1_drop=args.max_f1_drop) is not None:
+                    trainer.compression_report(X_test, y_test)
+        
+        # Distillation into a cascade (the saved model then serves through it)
+        if args.distill:
+            # Kaskada destilira šumu (ili njezinu kompaktnu verziju), ne logističku regresiju
+            if best_model != 'random_forest':
+                print(f"\nSkipping distillation: best model is {best_model}")
+            else:
+                print("\nDistilling best model into a cascade...")
+                trainer.distill(X_train, X_val, max_disagreement=args.max_disagreement)
+                trainer.evaluate_cascade(X_test, y_test)
         
         # Save best model
-        trainer.save_model(f'best_model_{best_model}.joblib')
+        model_filename = f'best_model_{best_model}.joblib'
+        trainer.save_model(model_filename)
         print(f"\nBest model ({best_model}) saved successfully!")
+        if model_filename != DEFAULT_MODEL_FILENAME:
+            # Web aplikacija i score.py inače poslužuju random forest
+            print(f"Serve it with URL_DETECTOR_MODEL={model_filename}")
 
 if __name__ == "__main__":
     main()
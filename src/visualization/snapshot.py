@@ -0,0 +1,131 @@
+"""Versioned snapshots of the /stats dashboard.
+
+A background job (src/snapshot.py) periodically queries the dashboard
+aggregates, renders the charts and writes everything to files named after a
+content hash of the data:
+
+    stats-<version>.json
+    daily_trend-<version>.png
+    confusion_matrix-<version>.png     (from models/evaluation.json)
+    feature_importance-<version>.png   (from models/evaluation.json)
+    manifest.json                      (current version; replaced atomically, last)
+
+The web process only reads these files through SnapshotReader; matplotlib is
+imported by the writer alone.
+"""
+import hashlib
+import json
+import os
+import time
+
+MANIFEST = 'manifest.json'
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def snapshot_version(stats, evaluation=None):
+    """Content hash of the snapshot data; unchanged data keeps the same version"""
+    payload = json.dumps({'stats': stats, 'evaluation': evaluation}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    return _read_json(path) if os.path.exists(path) else None
+
+
+def _render_charts(stats, evaluation, directory, version):
+    """Render the chart PNGs; returns {chart name: file name}"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from .visualizer import ResultVisualizer
+
+    visualizer = ResultVisualizer(directory)
+    charts = {}
+    if stats['dates']:
+        charts['daily_trend'] = f'daily_trend-{version}.png'
+        visualizer.plot_daily_trend(stats['dates'], stats['daily_malicious'], stats['daily_total'],
+                                    filename=charts['daily_trend'])
+    if evaluation:
+        charts['confusion_matrix'] = f'confusion_matrix-{version}.png'
+        visualizer.plot_confusion_counts(evaluation['confusion_matrix'], filename=charts['confusion_matrix'])
+        if evaluation.get('feature_importances'):
+            charts['feature_importance'] = f'feature_importance-{version}.png'
+            visualizer.plot_importances(evaluation['feature_importances'], evaluation['feature_names'],
+                                        filename=charts['feature_importance'])
+    return charts
+
+
+def _prune(directory, versions):
+    """Delete snapshot files whose version is no longer kept"""
+    for name in os.listdir(directory):
+        if name == MANIFEST or '-' not in name:
+            continue
+        version = name.rsplit('-', 1)[1].split('.', 1)[0]
+        if version not in versions:
+            os.remove(os.path.join(directory, name))
+
+
+def build_snapshot(db, directory, evaluation_file=None, keep=2):
+    """Write a new snapshot if the data changed and return the current manifest.
+
+    The previous ``keep - 1`` versions stay on disk so pages rendered just
+    before the switch can still load their charts.
+    """
+    stats = db.get_dashboard_stats()
+    evaluation = _read_json(evaluation_file) if evaluation_file and os.path.exists(evaluation_file) else None
+    version = snapshot_version(stats, evaluation)
+
+    manifest = read_manifest(directory)
+    if manifest is not None and manifest['version'] == version:
+        return manifest
+
+    os.makedirs(directory, exist_ok=True)
+    files = {'stats': f'stats-{version}.json'}
+    _write_json(os.path.join(directory, files['stats']), stats)
+    files.update(_render_charts(stats, evaluation, directory, version))
+
+    previous = manifest['history'] if manifest is not None else []
+    history = [version] + [v for v in previous if v != version][:keep - 1]
+    manifest = {
+        'version': version,
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime()),
+        'files': files,
+        'history': history
+    }
+    _write_json(os.path.join(directory, MANIFEST), manifest)
+    _prune(directory, history)
+    return manifest
+
+
+class SnapshotReader:
+    """Current snapshot for the web process; files are re-read only when the manifest changes"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._mtime = None
+        self._snapshot = None
+
+    def current(self):
+        """Return the manifest with the loaded ``stats``, or None if no snapshot exists"""
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._mtime:
+            manifest = _read_json(path)
+            stats = _read_json(os.path.join(self.directory, manifest['files']['stats']))
+            self._snapshot = dict(manifest, stats=stats)
+            self._mtime = mtime
+        return self._snapshot
@@ -9,35 +9,50 @@ def __init__(self, output_dir='visualizations'):
         self.output_dir = output_dir
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-    
+
+    def _finish(self, save, filename):
+        if save:
+            plt.tight_layout()
+            plt.savefig(os.path.join(self.output_dir, filename))
+            plt.close()
+        else:
+            plt.show()
+
     def plot_confusion_matrix(self, y_true, y_pred, save=True):
         """Plot confusion matrix"""
-        cm = confusion_matrix(y_true, y_pred)
+        self.plot_confusion_counts(confusion_matrix(y_true, y_pred), save=save)
+
+    def plot_confusion_counts(self, cm, save=True, filename='confusion_matrix.png'):
+        """Plot an already computed confusion matrix (e.g. loaded from evaluation.json)"""
         plt.figure(figsize=(10,7))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
+        sns.heatmap(np.asarray(cm), annot=True, fmt='d', cmap='Blues')
         plt.title('Confusion Matrix')
         plt.ylabel('True Label')
         plt.xlabel('Predicted Label')
-        
-        if save:
-            plt.savefig(os.path.join(self.output_dir, 'confusion_matrix.png'))
-            plt.close()
-        else:
-            plt.show()
-    
+        self._finish(save, filename)
+
     def plot_feature_importance(self, model, feature_names, save=True):
         """Plot feature importance"""
-        importances = model.feature_importances_
+        self.plot_importances(model.feature_importances_, feature_names, save=save)
+
+    def plot_importances(self, importances, feature_names, save=True, filename='feature_importance.png'):
+        """Plot feature importances given as an array aligned with feature_names"""
+        importances = np.asarray(importances)
         indices = np.argsort(importances)[::-1]
-        
+
         plt.figure(figsize=(12,6))
         plt.title('Feature Importance')
         plt.bar(range(len(importances)), importances[indices])
         plt.xticks(range(len(importances)), [feature_names[i] for i in indices], rotation=45, ha='right')
-        
-        if save:
-            plt.tight_layout()
-            plt.savefig(os.path.join(self.output_dir, 'feature_importance.png'))
-            plt.close()
-        else:
-            plt.show()
+        self._finish(save, filename)
+
+    def plot_daily_trend(self, dates, malicious, total, save=True, filename='daily_trend.png'):
+        """Plot checked and malicious URLs per day"""
+        plt.figure(figsize=(12,5))
+        plt.title('Daily Detections')
+        plt.plot(dates, total, marker='o', label='Checked URLs', color='#007bff')
+        plt.plot(dates, malicious, marker='o', label='Malicious URLs', color='#dc3545')
+        plt.xticks(rotation=45, ha='right')
+        plt.ylabel('URLs')
+        plt.legend()
+        self._finish(save, filename)
@@ -1,35 +1,36 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, make_response, send_from_directory
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import logging
-import datetime
 import sys
 import os
-import numpy as np
+import time
+import hashlib
+import json
 from urllib.parse import urlparse  # Dodajemo ovaj import
-import joblib  # Dodajemo import za joblib
 from collections import Counter
-from datetime import datetime, timedelta
-import sqlite3  # Dodajemo SQLite import na početak datoteke
+from datetime import datetime
 
-# Promijenite import u:
-import os
-import sys
+# Web proces ne smije uvoziti numpy/pandas/sklearn pri pokretanju - model se
+# učitava tek u warm_up() fazi (vidi ModelServer)
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 from src.db.database import Database
-from src.features.feature_extractor import FeatureExtractor
-from src.models.model_trainer import ModelTrainer
+from src.db.verdict_index import VerdictIndex
+from src.features.feature_extractor import FeatureExtractor, feature_row
+from src.features.url_parser import parse_url
+from src.features.heuristics import (
+    HEURISTIC_CONFIDENCE, is_known_safe, has_immediate_flags, heuristic_fallback
+)
+from src.models.model_server import ModelServer, model_filename_from_env
+from src.models.inference_scheduler import InferenceScheduler
+from src.models.drift_monitor import DriftMonitor, load_profile
+from src.web.shared_state import create_shared_state, state_uri_from_env, VerdictCache
+from src.visualization.snapshot import SnapshotReader
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 
-# Dodajemo whitelist sigurnih domena
-known_safe_domains = {
-    'google.com', 'microsoft.com', 'github.com', 'wikipedia.org',
-    'python.org', 'apple.com', 'amazon.com', 'facebook.com'
-}
-
 # Postavke za logging
 logging.basicConfig(
     filename='url_detector.log',
@@ -37,42 +38,139 @@
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Zajedničko stanje (rate limit brojači i cache presuda) za sve workere;
+# URL_DETECTOR_STATE_URI npr. redis://localhost:6379/0 ili sqlite:////dev/shm/url_detector.db
+state_uri = state_uri_from_env()
+verdict_cache = VerdictCache(create_shared_state(state_uri))
+
 # Modificiramo inicijalizaciju Limitera
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
-    storage_uri="memory://"
+    storage_uri=state_uri,
+    in_memory_fallback_enabled=True
 )
 
-# Initialize model trainer and feature extractor
-trainer = ModelTrainer()
+# Initialize model server and feature extractor; URL_DETECTOR_MODEL bira spremljeni model
+# (npr. best_model_logistic_regression.joblib za model s n-gramima)
+server = ModelServer(os.path.join(project_root, 'models'), model_filename_from_env())
 extractor = FeatureExtractor()
-model_loaded = False
+
+def score_rows(rows):
+    """Score a micro-batch of (feature row, url) pairs; the URL is needed by n-gram models"""
+    return server.predict_proba([features for features, _ in rows], urls=[url for _, url in rows])
+
+# Istovremeni zahtjevi se skupljaju u mikro-batcheve i boduju jednim pozivom modela
+scheduler = InferenceScheduler(
+    score_rows,
+    max_batch_size=int(os.environ.get('URL_DETECTOR_BATCH_SIZE', 32)),
+    max_wait_ms=float(os.environ.get('URL_DETECTOR_BATCH_WAIT_MS', 2))
+)
+INFERENCE_TIMEOUT = 10  # sekundi
 
 # Initialize database
 db = Database()
 
+# Statistika i grafovi koje unaprijed generira src/snapshot.py (web proces ne uvozi matplotlib)
+SNAPSHOT_DIR = os.environ.get('URL_DETECTOR_SNAPSHOT_DIR', os.path.join(project_root, 'snapshots'))
+snapshots = SnapshotReader(SNAPSHOT_DIR)
+
+# Nedavne presude iz url_checks u memoriji; puni se u warm_up() fazi
+verdict_index = VerdictIndex(max_age_days=int(os.environ.get('URL_DETECTOR_INDEX_MAX_AGE_DAYS', 30)))
+
+# Pomak značajki i propusnost po izvoru presude (po workeru); referentni profil sprema train.py
+monitor = DriftMonitor(window_seconds=int(os.environ.get('URL_DETECTOR_MONITOR_WINDOW_SECONDS', 300)))
+
 def load_model():
-    """Function to load model only once"""
-    global model_loaded
-    if not model_loaded:
+    """Load the model once; returns False if it is unavailable"""
+    if server.is_loaded():
+        return True
+    try:
+        print(f"Loading model from: {server.model_file}")
+        server.ensure_loaded()
+        print(f"Model loaded successfully in {server.load_seconds:.2f}s!")
+        return True
+    except Exception as e:
+        logging.error(f"Error loading model: {str(e)}")
+        print(f"Error loading model: {str(e)}")
+        return False
+
+def warm_up():
+    """Controlled warm-up phase: load the model and run one dummy prediction.
+
+    Call this from the server's startup hook (e.g. gunicorn ``post_fork``)
+    so that the first real request does not pay for imports and unpickling.
+    Returns the warm-up duration in seconds.
+    """
+    start = time.perf_counter()
+    if load_model():
+        features = extractor.extract_features('http://example.com/')
+        server.predict_proba([feature_row(features)], urls=['http://example.com/'])
+    load_verdict_index()
+    load_feature_profile()
+    elapsed = time.perf_counter() - start
+    logging.info(f"Warm-up finished in {elapsed:.2f}s (model loaded: {server.is_loaded()})")
+    return elapsed
+
+def load_verdict_index():
+    """Load recent verdicts of the current model (and heuristic verdicts) into memory"""
+    try:
+        count = verdict_index.load(db, model_version=server.version)
+    except Exception as e:
+        logging.error(f"Error loading verdict index: {str(e)}")
+        return 0
+    message = (f"Verdict index: {count} URLs loaded in {verdict_index.load_seconds:.2f}s, "
+               f"{verdict_index.memory_bytes() / 1024 ** 2:.1f} MB "
+               f"({verdict_index.bytes_per_million() / 1024 ** 2:.1f} MB per million URLs)")
+    print(message)
+    logging.info(message)
+    return count
+
+def load_feature_profile():
+    """Load the training-time feature profile that /monitor compares traffic against"""
+    profile_file = os.path.join(server.model_path, 'feature_profile.json')
+    if not os.path.exists(profile_file):
+        logging.info(f"No feature profile at {profile_file}; /monitor reports throughput only")
+        return False
+    try:
+        monitor.set_profile(load_profile(profile_file))
+    except Exception as e:
+        logging.error(f"Error loading feature profile: {str(e)}")
+        return False
+    return True
+
+def record_check(url, parsed, ip_address, is_malicious, confidence, features, warning=None, model_version=None,
+                 source='model', started=None):
+    """Store a check in the database, keep the verdict index in sync and count it in the monitor"""
+    row_id = db.add_check(url, is_malicious, confidence, features, ip_address, warning, model_version, source)
+    # Histogrami samo za vektore koje je model stvarno bodovao
+    monitor.observe(features if source == 'model' else None, is_malicious, source,
+                    None if started is None else time.perf_counter() - started)
+    # U indeks idu samo presude koje bi uzeo i load(): heurističke i presude trenutnog modela
+    if warning is not None or (model_version is not None and model_version == verdict_index.model_version):
+        verdict_index.add(parsed.canonical, row_id, is_malicious, confidence, warning)
+    return row_id
+
+def remember_verdict(parsed, result):
+    """Store a verdict in the shared cache under the canonical URL and return it"""
+    verdict_cache.put(parsed.canonical, {k: v for k, v in result.items() if k != 'url'})
+    return result
+
+def complete_features_after_response(response, row_id, parsed, lazy_features, result):
+    """Compute the feature groups a whitelist/heuristic verdict skipped once the response is sent.
+
+    The stored row and the cached verdict then carry the full vector, which
+    index replays, cache hits and the export for retraining read.
+    """
+    def complete():
         try:
-            model_path = os.path.join(project_root, 'models', 'best_model_random_forest.joblib')
-            print(f"Loading model from: {model_path}")
-            trainer.model = joblib.load(model_path)  # Promijenjen način učitavanja
-            model_loaded = True
-            print("Model loaded successfully!")
+            features = lazy_features.to_dict()
+            db.update_check_features(row_id, features)
+            remember_verdict(parsed, dict(result, features=features))
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
-            sys.exit(1)
-
-# Load model only on main thread
-if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
-    print("\nWeb aplikacija je pokrenuta!")
-    print("Otvorite jedan od ovih linkova u browseru:")
-    print("* http://localhost:5000")
-    print("* http://127.0.0.1:5000")
-    load_model()
+            logging.error(f"Error completing features of {parsed.url}: {str(e)}")
+    response.call_on_close(complete)
+    return response
 
 @app.route('/', methods=['GET'])
 def home():
@@ -85,83 +183,108 @@ def predict():
     try:
         url = request.form['url']
         ip_address = request.remote_addr
+        started = time.perf_counter()
         
         # Logiranje zahtjeva
         logging.info(f"Request from {ip_address} - URL: {url}")
         
         print(f"Processing URL: {url}")
         
-        # Extract features first to avoid potential errors
-        features = extractor.extract_features(url)
-        feature_list = list(features.values())
+        # URL se parsira jednom; isti ParsedURL koriste ekstrakcija, heuristike, cache i baza
+        parsed = parse_url(url)
         
-        # Prvo provjerimo je li URL na whitelisti
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
-        base_domain = '.'.join(domain.split('.')[-2:])
+        # Već provjereni URL: presuda iz indeksa u memoriji, bez ekstrakcije i modela
+        verdict_index.maybe_sync(db)
+        indexed = verdict_index.lookup(parsed.canonical)
+        # Red je možda arhiviran ili obrisan - tada je to promašaj i URL se boduje ispočetka
+        features = db.get_check_features(indexed.row_id) if indexed is not None else None
+        if features is not None:
+            model_version = None if indexed.warning else verdict_index.model_version
+            record_check(url, parsed, ip_address, indexed.is_malicious, indexed.confidence, features,
+                         indexed.warning, model_version, source='index', started=started)
+            return render_template('result.html', result={
+                'url': url,
+                'is_malicious': indexed.is_malicious,
+                'confidence': indexed.confidence,
+                'features': features,
+                'warning': indexed.warning
+            })
+        
+        # Presuda iz zajedničkog cachea (dijele ga svi workeri)
+        cached = verdict_cache.get(parsed.canonical)
+        if cached is not None:
+            record_check(url, parsed, ip_address, cached['is_malicious'], cached['confidence'],
+                         cached['features'], cached['warning'], cached.get('model_version'),
+                         source='cache', started=started)
+            return render_template('result.html', result=dict(cached, url=url))
         
-        if (base_domain in known_safe_domains):
+        # Značajke se računaju po grupama tek kad ih netko pročita, pa whitelist i
+        # heuristike odlučuju bez punog vektora. Odgovor nosi izračunate grupe, a ostatak
+        # se dopunjuje u bazi i cacheu nakon slanja odgovora (replay i izvoz čitaju puni rječnik)
+        lazy_features = extractor.lazy_features(parsed)
+        
+        # Prvo provjerimo je li URL na whitelisti
+        if is_known_safe(parsed):
+            features = lazy_features.computed()
             # Dodaj u bazu
-            db.add_check(url, False, 0.95, features, ip_address, "Known safe domain")
-            return render_template('result.html', result={
+            row_id = record_check(url, parsed, ip_address, False, HEURISTIC_CONFIDENCE, features,
+                                  "Known safe domain", source='whitelist', started=started)
+            result = remember_verdict(parsed, {
                 'url': url,
                 'is_malicious': False,
-                'confidence': 0.95,
+                'confidence': HEURISTIC_CONFIDENCE,
                 'features': features,  # Dodano
                 'warning': 'Known safe domain'
             })
+            return complete_features_after_response(make_response(render_template('result.html', result=result)),
+                                                    row_id, parsed, lazy_features, result)
         
         # Provjera očitih malicioznih znakova
-        immediate_flags = any([
-            features.get('is_shortened_url', False),
-            features.get('has_typosquatting', False),
-            features.get('has_number_letter_substitution', False),
-            len(url) > 100,
-            features.get('suspicious_word_count', 0) > 2,
-            features.get('suspicious_domain', False),
-            features.get('path_has_suspicious_word', False),
-            features.get('has_suspicious_chars', False),
-            sum(1 for word in ['admin', 'password', 'login'] if word in url.lower()) > 0
-        ])
-        
-        if immediate_flags:
+        if has_immediate_flags(parsed, lazy_features):
+            features = lazy_features.computed()
             # Dodaj u bazu
-            db.add_check(url, True, 0.95, features, ip_address, "Suspicious patterns detected")
-            return render_template('result.html', result={
+            row_id = record_check(url, parsed, ip_address, True, HEURISTIC_CONFIDENCE, features,
+                                  "Suspicious patterns detected", source='heuristic', started=started)
+            result = remember_verdict(parsed, {
                 'url': url,
                 'is_malicious': True,
-                'confidence': 0.95,
+                'confidence': HEURISTIC_CONFIDENCE,
                 'features': features,  # Dodano
                 'warning': 'Suspicious patterns detected'
             })
+            return complete_features_after_response(make_response(render_template('result.html', result=result)),
+                                                    row_id, parsed, lazy_features, result)
+        
+        # Puni vektor za model
+        features = lazy_features.to_dict()
+        feature_list = feature_row(features)
         
         # Model prediction ako nije očito maliciozan
         try:
-            if not hasattr(trainer, 'model') or trainer.model is None:
-                load_model()
+            if not load_model():
+                raise RuntimeError("Model is not loaded")
             
-            prediction = trainer.model.predict([feature_list])[0]
-            probability = trainer.model.predict_proba([feature_list])[0]
+            probability = scheduler.score((feature_list, url), timeout=INFERENCE_TIMEOUT)
+            prediction = server.model.classes_[probability.argmax()]
             
             # Nakon predikcije modela
-            db.add_check(url, bool(prediction), float(max(probability)), features, ip_address)
+            record_check(url, parsed, ip_address, bool(prediction), float(max(probability)), features,
+                         model_version=server.version, started=started)
             
-            return render_template('result.html', result={
+            return render_template('result.html', result=remember_verdict(parsed, {
                 'url': url,
                 'is_malicious': bool(prediction),
                 'confidence': float(max(probability)),
                 'features': features,
-                'warning': None
-            })
+                'warning': None,
+                'model_version': server.version
+            }))
             
         except Exception as e:
             logging.error(f"Model prediction error: {str(e)}")
             # Fallback na heuristički pristup ako model ne radi
-            is_suspicious = any([
-                features.get('suspicious_domain', False),
-                features.get('has_suspicious_chars', False),
-                features.get('suspicious_word_count', 0) > 1
-            ])
+            is_suspicious = heuristic_fallback(features)
+            monitor.observe(None, is_suspicious, 'fallback', time.perf_counter() - started)
             
             return render_template('result.html', result={
                 'url': url,
@@ -220,59 +343,51 @@ def get_daily_stats():
 @app.route('/stats', methods=['GET'])
 def stats():
     try:
-        # Dohvaćamo statistiku direktno iz baze
-        with sqlite3.connect(db.db_file) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Dohvaćamo ukupne brojeve
-            stats = cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_checks,
-                    SUM(CASE WHEN is_malicious THEN 1 ELSE 0 END) as malicious_count,
-                    SUM(CASE WHEN NOT is_malicious THEN 1 ELSE 0 END) as safe_count
-                FROM url_checks
-            ''').fetchone()
-            
-            # Dohvaćamo najčešće domene
-            domains = cursor.execute('''
-                SELECT url, COUNT(*) as count 
-                FROM url_checks 
-                GROUP BY url 
-                ORDER BY count DESC 
-                LIMIT 10
-            ''').fetchall()
-            
-            # Dohvaćamo dnevnu statistiku
-            daily = cursor.execute('''
-                SELECT 
-                    date(check_date) as check_day,
-                    COUNT(CASE WHEN is_malicious THEN 1 END) as malicious_count
-                FROM url_checks 
-                GROUP BY date(check_date)
-                ORDER BY check_day
-            ''').fetchall()
-            
-        stats_data = {
-            'total_checks': stats['total_checks'],
-            'malicious_detected': stats['malicious_count'] or 0,  # Dodajemo or 0 za slučaj NULL
-            'safe_urls': stats['safe_count'] or 0,  # Dodajemo or 0 za slučaj NULL
-            'domain_names': [d['url'] for d in domains],
-            'domain_counts': [d['count'] for d in domains],
-            'dates': [d['check_day'] for d in daily],
-            'daily_malicious': [d['malicious_count'] or 0 for d in daily]  # Dodajemo or 0
-        }
+        snapshot = snapshots.current()
+        if snapshot is not None:
+            stats_data, charts, etag = snapshot['stats'], snapshot['files'], snapshot['version']
+            generated_at = snapshot['generated_at']
+        else:
+            # Snapshot job još nije pokrenut - računamo direktno iz baze
+            stats_data, charts, generated_at = db.get_dashboard_stats(), {}, None
+            etag = hashlib.sha1(json.dumps(stats_data).encode()).hexdigest()[:12]
         
-        return render_template('stats.html', stats=stats_data)
+        # Conditional GET: nepromijenjena statistika se ne renderira ponovno
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(render_template('stats.html', stats=stats_data, charts=charts,
+                                                     generated_at=generated_at))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         logging.error(f"Error generating stats: {str(e)}")
         return render_template('error.html', error_message=str(e))  # Pokazujemo stvarnu grešku
 
+@app.route('/snapshots/<path:filename>', methods=['GET'])
+def snapshot_file(filename):
+    # Imena sadrže verziju pa se datoteke smiju cacheirati neograničeno
+    return send_from_directory(SNAPSHOT_DIR, filename, max_age=31536000)
+
+@app.route('/monitor', methods=['GET'])
+def monitor_report():
+    # Stanje ovog workera; ?windows=N ograničava izvještaj na zadnjih N prozora
+    return jsonify(monitor.report(windows=request.args.get('windows', type=int)))
+
 @app.route('/history', methods=['GET'])
 def history():
     recent_checks = db.get_recent_checks()
     return render_template('history.html', checks=recent_checks)
 
 if __name__ == '__main__':
+    # Warm-up samo u procesu koji poslužuje zahtjeve (ne u reloader roditelju)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_up()
+    else:
+        print("\nWeb aplikacija je pokrenuta!")
+        print("Otvorite jedan od ovih linkova u browseru:")
+        print("* http://localhost:5000")
+        print("* http://127.0.0.1:5000")
     app.run(debug=True)
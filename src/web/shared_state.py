@@ -0,0 +1,292 @@
+"""Shared state for multi-worker deployments: rate-limit counters and verdict cache.
+
+The backend is chosen by a URI:
+    memory://                      - in-process dict (default, tests, single worker)
+    sqlite:////dev/shm/state.db    - SQLite file shared by all workers on one host
+    redis://localhost:6379/0       - Redis-compatible server shared by all hosts
+
+The same URI is given to Flask-Limiter, so rate-limit counters live in the
+same backend as the verdict cache. ``sqlite://`` is registered as a storage
+scheme for the ``limits`` package by SQLiteLimitsStorage below.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+
+class MemoryState:
+    """In-process backend; state is not shared between workers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._values = {}
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            return {key: self._values[key][0] for key in keys
+                    if key in self._values and self._values[key][1] > now}
+
+    def set_many(self, mapping, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._values[key] = (value, expires_at)
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with self._lock:
+            value, expires_at = self._counters.get(key, (0, 0))
+            if expires_at <= now:
+                value, expires_at = 0, now + expiry
+            value += amount
+            self._counters[key] = (value, expires_at)
+            return value
+
+    def get(self, key):
+        value, expires_at = self._counters.get(key, (0, 0))
+        return value if expires_at > time.time() else 0
+
+    def get_expiry(self, key):
+        return self._counters.get(key, (0, time.time()))[1]
+
+    def clear(self, key):
+        with self._lock:
+            self._counters.pop(key, None)
+            self._values.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            count = len(self._counters) + len(self._values)
+            self._counters.clear()
+            self._values.clear()
+            return count
+
+
+class SQLiteState:
+    """Single-host backend: one SQLite file (WAL mode) shared by all worker processes.
+
+    Put the file on a tmpfs such as /dev/shm to keep it in shared memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        ''')
+
+    def _conn(self):
+        # Jedna konekcija po dretvi; autocommit, transakcije otvaramo ručno
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self._conn().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) AND expires_at > ?',
+            (*keys, time.time())
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, mapping, ttl):
+        expires_at = time.time() + ttl
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                [(key, json.dumps(value), expires_at) for key, value in mapping.items()]
+            )
+            # Usput brišemo istekle zapise da tablica ne raste
+            conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('''
+                INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END,
+                    expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+            ''', (key, amount, now + expiry, now, now))
+            return conn.execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()[0]
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute('SELECT expires_at FROM counters WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM counters WHERE key = ?', (key,))
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def reset(self):
+        conn = self._conn()
+        with conn:
+            count = conn.execute('DELETE FROM counters').rowcount
+            count += conn.execute('DELETE FROM cache').rowcount
+        return count
+
+
+class RedisState:
+    """Redis-compatible backend; all multi-key operations go through one pipeline"""
+
+    def __init__(self, uri):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis:// backend requires the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(uri)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget(keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, mapping, ttl):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, json.dumps(value), ex=int(ttl))
+        pipe.execute()
+
+    def incr(self, key, expiry, amount=1):
+        # SET NX postavlja istek samo novom prozoru; oba poziva idu u jednom round-tripu
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(key, 0, ex=int(expiry), nx=True)
+        pipe.incrby(key, amount)
+        return pipe.execute()[1]
+
+    def get(self, key):
+        return int(self.client.get(key) or 0)
+
+    def get_expiry(self, key):
+        return time.time() + max(self.client.ttl(key), 0)
+
+    def clear(self, key):
+        self.client.delete(key)
+
+    def reset(self):
+        return self.client.flushdb()
+
+
+def _sqlite_path(uri):
+    """File path of a sqlite URI, following SQLAlchemy's convention.
+
+    sqlite:///rel/path.db -> rel/path.db (relative to the working directory),
+    sqlite:////abs/path.db -> /abs/path.db; sqlite:// uses shared_state.db.
+    """
+    rest = uri.split('://', 1)[1]
+    if not rest:
+        return 'shared_state.db'
+    if not rest.startswith('/'):
+        raise ValueError(f"Invalid SQLite URI {uri!r}: use sqlite:///relative.db or sqlite:////absolute.db")
+    return rest[1:] or 'shared_state.db'
+
+
+def create_shared_state(uri='memory://'):
+    """Create a shared-state backend from a storage URI"""
+    scheme = uri.split('://', 1)[0]
+    if scheme == 'memory':
+        return MemoryState()
+    if scheme == 'sqlite':
+        return SQLiteState(_sqlite_path(uri))
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisState(uri)
+    raise ValueError(f"Unsupported shared state URI: {uri}")
+
+
+class SQLiteLimitsStorage(Storage):
+    """Storage for the ``limits`` package (used by Flask-Limiter) backed by SQLiteState"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.state = SQLiteState(_sqlite_path(uri))
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1, elastic_expiry=False):
+        return self.state.incr(key, expiry, amount)
+
+    def get(self, key):
+        return self.state.get(key)
+
+    def get_expiry(self, key):
+        return self.state.get_expiry(key)
+
+    def check(self):
+        try:
+            self.state.get('__health__')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.state.reset()
+
+    def clear(self, key):
+        self.state.clear(key)
+
+
+class VerdictCache:
+    """Verdicts keyed by canonical URL, stored in a shared-state backend"""
+
+    def __init__(self, state, ttl=3600, prefix='verdict:'):
+        self.state = state
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get_many(self, urls):
+        found = self.state.get_many(self.prefix + url for url in urls)
+        return {key[len(self.prefix):]: value for key, value in found.items()}
+
+    def get(self, url):
+        return self.get_many([url]).get(url)
+
+    def put_many(self, verdicts):
+        self.state.set_many({self.prefix + url: verdict for url, verdict in verdicts.items()}, self.ttl)
+
+    def put(self, url, verdict):
+        self.put_many({url: verdict})
+
+
+def state_uri_from_env():
+    return os.environ.get('URL_DETECTOR_STATE_URI', 'memory://')
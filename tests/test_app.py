@@ -1,5 +1,17 @@
 import unittest
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+from src.web import app as app_module
 from src.web.app import app
+from src.visualization.snapshot import build_snapshot, SnapshotReader
+from src.features.feature_extractor import FEATURE_NAMES
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 class TestFlaskApp(unittest.TestCase):
     def setUp(self):
@@ -16,5 +28,101 @@ def test_predict_endpoint(self):
         })
         self.assertEqual(response.status_code, 200)
 
+    def test_repeated_url_served_from_verdict_index(self):
+        url = 'https://docs.python.org/3/library/index.html'
+        with mock.patch.object(app_module.limiter, 'enabled', False):
+            # Server zatvara odgovor nakon slanja; tada se dopunjuju značajke whitelist presude
+            self.client.post('/predict', data={'url': url}).close()
+            # Druga provjera istog URL-a ne smije pokrenuti ekstrakciju
+            with mock.patch.object(app_module.extractor, 'lazy_features', side_effect=AssertionError):
+                response = self.client.post('/predict', data={'url': url + '#top'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Safe', response.data)
+        # Značajke dolaze iz spremljenog reda u bazi - puni vektor i za whitelist presude
+        for name in FEATURE_NAMES:
+            self.assertIn(f'"{name}"'.encode(), response.data)
+        # Izvor presude se sprema, pa i monitor.py ne broji ponovljeni URL kao bodovani vektor
+        self.assertEqual(app_module.db.get_recent_checks(1)[0]['source'], 'index')
+
+    def test_index_hit_without_stored_row_is_a_miss(self):
+        url = 'http://bit.ly/archived-row'
+        parsed = app_module.parse_url(url)
+        # Indeks pokazuje na red koji je retencija već arhivirala
+        app_module.verdict_index.add(parsed.canonical, 10 ** 9, True, 0.95, 'Suspicious patterns detected')
+        with mock.patch.object(app_module.limiter, 'enabled', False):
+            self.client.post('/predict', data={'url': url}).close()
+        stored = app_module.db.get_recent_checks(1)[0]
+        self.assertEqual(stored['source'], 'heuristic')
+        self.assertEqual(list(json.loads(stored['features'])), list(FEATURE_NAMES))
+        self.assertEqual(app_module.verdict_index.lookup(parsed.canonical).row_id, stored['id'])
+
+    def test_heuristic_verdict_stores_full_features(self):
+        with mock.patch.object(app_module.limiter, 'enabled', False):
+            response = self.client.post('/predict', data={'url': 'http://bit.ly/heuristic-test'})
+        self.assertIn(b'Malicious', response.data)
+        # Na putu zahtjeva računaju se samo grupe koje je heuristika pročitala (bez brand indeksa)
+        stored = json.loads(app_module.db.get_recent_checks(1)[0]['features'])
+        self.assertNotIn('has_typosquatting', stored)
+        response.close()
+        stored = json.loads(app_module.db.get_recent_checks(1)[0]['features'])
+        self.assertEqual(list(stored), list(FEATURE_NAMES))
+        cached = app_module.verdict_cache.get(app_module.parse_url('http://bit.ly/heuristic-test').canonical)
+        self.assertEqual(list(cached['features']), list(FEATURE_NAMES))
+
+    def test_monitor_counts_checks_by_source(self):
+        monitor = app_module.DriftMonitor(window_seconds=60)
+        with mock.patch.object(app_module.limiter, 'enabled', False), \
+                mock.patch.object(app_module, 'monitor', monitor):
+            self.client.post('/predict', data={'url': 'https://www.google.com'})
+            report = self.client.get('/monitor').get_json()
+        self.assertEqual(report['checks'], 1)
+        self.assertEqual(list(report['sources']), ['whitelist'])
+        self.assertIsNotNone(report['sources']['whitelist']['mean_ms'])
+
+    def test_stats_conditional_get(self):
+        response = self.client.get('/stats')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        response = self.client.get('/stats', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_stats_served_from_snapshot(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+        app_module.db.add_check('http://snapshot-test.com/', False, 0.9, {})
+        manifest = build_snapshot(app_module.db, snapshot_dir)
+        with mock.patch.object(app_module, 'SNAPSHOT_DIR', snapshot_dir), \
+                mock.patch.object(app_module, 'snapshots', SnapshotReader(snapshot_dir)):
+            response = self.client.get('/stats')
+            self.assertEqual(response.headers['ETag'], f'"{manifest["version"]}"')
+            chart = manifest['files']['daily_trend']
+            self.assertIn(chart.encode(), response.data)
+            image = self.client.get(f'/snapshots/{chart}')
+            self.assertEqual(image.status_code, 200)
+            self.assertEqual(image.mimetype, 'image/png')
+            image.close()
+
+    def test_cold_import_skips_heavy_modules(self):
+        # Import web aplikacije ne smije povući trening ovisnosti
+        code = (
+            "import sys; import src.web.app; "
+            "print(','.join(m for m in ('numpy', 'pandas', 'sklearn', 'joblib', 'scipy', 'matplotlib') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(output, '')
+
+    def test_served_model_file_from_env(self):
+        # Model s n-gramima (logistička regresija) poslužuje se preko URL_DETECTOR_MODEL
+        code = "import src.web.app as a, src.score as s; print(a.server.filename); print(s.model_filename_from_env())"
+        env = dict(os.environ, URL_DETECTOR_MODEL='best_model_logistic_regression.joblib')
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=PROJECT_ROOT, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        self.assertEqual(output, ['best_model_logistic_regression.joblib'] * 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.features.brand_index import BrandIndex, edit_distance
+from src.features.feature_extractor import FeatureExtractor
+from src.features.heuristics import has_immediate_flags
+from src.features.url_parser import parse_url
+
+
+class TestBrandIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = BrandIndex(['google', 'paypal', 'microsoft', 'visa'])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance('google', 'google', 2), 0)
+        self.assertEqual(edit_distance('gogle', 'google', 2), 1)
+        self.assertEqual(edit_distance('googel', 'google', 2), 1)  # transpozicija
+        self.assertEqual(edit_distance('example', 'google', 2), 3)
+
+    def test_nearest(self):
+        self.assertEqual(self.index.nearest('mircosoft').brand, 'microsoft')
+        self.assertEqual(self.index.nearest('gooogle').distance, 1)
+        self.assertIsNone(self.index.nearest('example'))
+        self.assertIsNone(self.index.nearest('vista'))  # kratki brand, druga duljina
+        self.assertIsNone(self.index.nearest('vixa'))   # kratki brand, samo točno ili homoglif
+        self.assertEqual(self.index.nearest('goigle').brand, 'google')  # susjedna tipka
+        self.assertIsNone(self.index.nearest('gaogle'))                  # nesusjedna tipka
+
+    def test_long_tokens_skip_deletion_variants(self):
+        # Predugi tokeni (npr. labela od 63 znaka) ne smiju generirati varijante brisanja
+        with mock.patch('src.features.brand_index._deletes', side_effect=AssertionError):
+            self.assertIsNone(self.index.nearest('a' * 61))
+            self.assertIsNone(self.index.nearest('rn' * 30))
+        self.assertEqual(self.index.nearest('rnicrosoft').brand, 'microsoft')
+
+    def test_homoglyphs(self):
+        match = self.index.nearest('g00gle')
+        self.assertEqual(match.brand, 'google')
+        self.assertTrue(match.homoglyph)
+        self.assertTrue(self.index.nearest('paypa1').homoglyph)
+
+
+class TestTyposquattingFeatures(unittest.TestCase):
+    def setUp(self):
+        self.extractor = FeatureExtractor()
+
+    def test_brand_domains_not_flagged(self):
+        for domain in ['google.com', 'www.google.com', 'mail.google.com', 'amazon.co.uk']:
+            self.assertFalse(self.extractor._check_typosquatting(domain), domain)
+
+    def test_typosquatting_flagged(self):
+        for domain in ['gooogle.com', 'paypal.evil.com', 'paypal-secure.com', 'rnicrosoft.com']:
+            self.assertTrue(self.extractor._check_typosquatting(domain), domain)
+
+    def test_common_words_near_brands_not_flagged(self):
+        for domain in ['email.com', 'cooking.com', 'looking.com', 'telegraph.co.uk', 'apply.com',
+                       'officer.com', 'twister.com', 'steak.com', 'adore.com', 'bookings.org',
+                       'www.example.com', 'python.org', 'news.bbc.co.uk', 'stackoverflow.com']:
+            self.assertFalse(self.extractor._check_typosquatting(domain), domain)
+
+    def test_common_word_brands_need_typo_or_homoglyph(self):
+        for domain in ['office-depot.com', 'visa.europa.eu', 'steam-engine.org', 'booking-tips.net',
+                       'chase-outdoors.com']:
+            self.assertFalse(self.extractor._check_typosquatting(domain), domain)
+        for domain in ['vi5a-secure.com', '0ffice-login.com', 'stearn-gift.com', 'dhl-parcel.com']:
+            self.assertTrue(self.extractor._check_typosquatting(domain), domain)
+        self.assertTrue(self.extractor._check_number_substitution('dh1-parcel.com'))
+
+    def test_common_domain_not_a_heuristic_verdict(self):
+        for url in ['https://www.telegraph.co.uk/news', 'https://booking-tips.net/guide']:
+            parsed = parse_url(url)
+            self.assertFalse(has_immediate_flags(parsed, self.extractor.lazy_features(parsed)), url)
+
+    def test_number_substitution_requires_brand(self):
+        self.assertTrue(self.extractor._check_number_substitution('micr0s0ft.com'))
+        self.assertFalse(self.extractor._check_number_substitution('site123.org'))
+
+
+if __name__ == '__main__':
+    unittest.main()
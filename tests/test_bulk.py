@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.database import Database, INDEXES
+from src.db.bulk import import_file, export_file
+from src.db.verdict_index import url_key
+from src.features.url_parser import parse_url
+
+
+class TestBulkTransfer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source = Database(os.path.join(self.tmp_dir, 'source.db'))
+        for i in range(25):
+            self.source.add_check(f'http://site{i}.co.uk/page', i % 3 == 0, 0.5 + i / 100,
+                                  {'url_length': i}, '127.0.0.1', None, model_version='rf:1', source='model')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def rows(self, db):
+        with sqlite3.connect(db.db_file) as conn:
+            return conn.execute('''
+                SELECT url, check_date, is_malicious, confidence, features, ip_address,
+                       status_message, domain, model_version, url_key, source
+                FROM url_checks ORDER BY id
+            ''').fetchall()
+
+    def index_names(self, db):
+        with sqlite3.connect(db.db_file) as conn:
+            return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    def test_round_trip(self):
+        for name in ('checks.csv', 'checks.parquet'):
+            target = Database(self.path(f'target-{name}.db'))
+            self.assertEqual(export_file(self.source, self.path(name), chunk_size=10), 25)
+            self.assertEqual(import_file(target, self.path(name), batch_size=7), 25)
+            self.assertEqual(self.rows(target), self.rows(self.source), name)
+            self.assertTrue(set(INDEXES) <= self.index_names(target))
+
+    def test_export_since_id(self):
+        self.assertEqual(export_file(self.source, self.path('new.csv'), since_id=20), 5)
+
+    def test_external_csv_gets_domain_and_key(self):
+        with open(self.path('external.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url', 'is_malicious'])
+            writer.writerow(['http://Shop.Example.co.uk/x', 'true'])
+            writer.writerow(['http://b.com', '0'])
+        target = Database(self.path('target.db'))
+        import_file(target, self.path('external.csv'))
+        rows = self.rows(target)
+        self.assertEqual(rows[0][2], 1)
+        self.assertEqual(rows[0][7], 'example.co.uk')
+        self.assertEqual(rows[0][9], url_key(parse_url('http://Shop.Example.co.uk/x').canonical))
+        self.assertIsNotNone(rows[1][1])  # check_date dobiva trenutno vrijeme
+
+    def test_failed_import_rolls_back(self):
+        with open(self.path('broken.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url'])
+            writer.writerow(['http://ok.com'])
+            writer.writerow([''])
+        with self.assertRaises(ValueError):
+            import_file(self.source, self.path('broken.csv'), batch_size=1)
+        self.assertEqual(len(self.rows(self.source)), 25)
+        self.assertTrue(set(INDEXES) <= self.index_names(self.source))
+
+
+if __name__ == '__main__':
+    unittest.main()
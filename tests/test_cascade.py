@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+from sklearn.datasets import make_classification
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models.cascade import CascadeClassifier, choose_thresholds
+from src.models.model_trainer import ModelTrainer
+
+
+class TestCascade(unittest.TestCase):
+    def setUp(self):
+        X, y = make_classification(n_samples=1500, n_features=37, random_state=42)
+        self.X_train, self.y_train = X[:900], y[:900]
+        self.X_val = X[900:1200]
+        self.X_test, self.y_test = X[1200:], y[1200:]
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        self.trainer = ModelTrainer(model_path=model_dir, n_jobs=1)
+        self.trainer.param_grids['random_forest']['params']['n_estimators'] = [100]
+        del self.trainer.param_grids['logistic_regression']
+
+    def test_choose_thresholds(self):
+        proba = np.array([0.0, 0.1, 0.2, 0.4, 0.6, 0.8, 0.9, 1.0])
+        teacher = np.array([0, 0, 0, 1, 0, 1, 1, 1])
+        self.assertEqual(choose_thresholds(proba, teacher, 0.0), (0.2, 0.8))
+        # Jednaki scoreovi: prag ne smije zahvatiti samo dio njih
+        proba = np.array([0.0] * 300 + [1.0] * 300)
+        teacher = np.array([0] * 300 + [1] * 300)
+        self.assertEqual(choose_thresholds(proba, teacher, 0.005), (0.0, 1.0))
+
+    def test_biased_student_keeps_teacher_labels(self):
+        class Fixed:
+            def __init__(self, values):
+                self.values = values
+
+            def predict(self, X):
+                return self.values[X[:, 0].astype(int)]
+
+        class Teacher:
+            classes_ = np.array([0, 1])
+
+            def predict_proba(self, X):
+                labels = (X[:, 0] >= 1000).astype(float)
+                return np.column_stack([1 - labels, labels])
+
+        # Student je pomaknut prema "malicious": sigurni URL-ovi dobiju do 0.6
+        rng = np.random.RandomState(0)
+        scores = np.concatenate([rng.uniform(0, 0.6, 1000), rng.uniform(0.7, 1.0, 1000)])
+        teacher_labels = np.array([0] * 1000 + [1] * 1000)
+        low, high = choose_thresholds(scores, teacher_labels, 0.005)
+        self.assertLess(low, 0.5)
+        self.assertGreater(high, 0.5)
+
+        X = np.arange(2000, dtype=np.float32).reshape(-1, 1)
+        cascade = CascadeClassifier(Fixed(scores), Teacher(), low, high)
+        disagreement = np.mean(cascade.predict(X) != teacher_labels)
+        self.assertLessEqual(disagreement, 0.005)
+
+    def test_distill_and_evaluate(self):
+        results = self.trainer.train_all_models(self.X_train, self.y_train)
+        self.trainer.select_best_model(results)
+        cascade = self.trainer.distill(self.X_train, self.X_val)
+        self.assertIsInstance(cascade, CascadeClassifier)
+        self.assertLess(cascade.student.n_estimators, cascade.teacher.n_estimators)
+
+        report = self.trainer.evaluate_cascade(self.X_test, self.y_test)
+        self.assertGreater(report['agreement_with_teacher'], 0.95)
+        self.assertLessEqual(report['escalation_rate'], 1.0)
+        self.assertEqual(cascade.predict_proba(self.X_test).shape, (len(self.X_test), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models.compact_forest import CompactForest
+from src.models.model_trainer import ModelTrainer
+
+
+class TestCompactForest(unittest.TestCase):
+    def setUp(self):
+        X, y = make_classification(n_samples=1500, n_features=37, random_state=42)
+        self.X_train, self.y_train = X[:1000], y[:1000]
+        self.X_test, self.y_test = X[1000:], y[1000:]
+        self.forest = RandomForestClassifier(n_estimators=40, random_state=42).fit(self.X_train, self.y_train)
+
+    def test_matches_forest(self):
+        for dtype in ('uint8', 'float16'):
+            compact = CompactForest.from_forest(self.forest, threshold_dtype=dtype)
+            expected = self.forest.predict_proba(self.X_test)[:, 1]
+            actual = compact.predict_proba(self.X_test)[:, 1]
+            # uint8 pragovi su točni; float16 ponekad okrene pojedini split
+            self.assertLess(np.abs(expected - actual).mean(), 0.005, dtype)
+            if dtype == 'uint8':
+                self.assertLess(np.abs(expected - actual).max(), 0.01)
+            agreement = (compact.predict(self.X_test) == self.forest.predict(self.X_test)).mean()
+            self.assertGreater(agreement, 0.98, dtype)
+
+    def test_pruning_and_truncate(self):
+        full = CompactForest.from_forest(self.forest)
+        pruned = CompactForest.from_forest(self.forest, prune_tolerance=0.1)
+        self.assertLess(pruned.n_nodes, full.n_nodes)
+        self.assertEqual(full.truncate(10).n_estimators, 10)
+
+    def trainer(self, forest):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        trainer = ModelTrainer(model_path=model_dir)
+        trainer.current_model = forest
+        return trainer
+
+    def test_compress_within_budget(self):
+        # Budžet se provjerava na jednom dijelu, izvještaj na drugom (neviđenom) dijelu
+        X_holdout, y_holdout = self.X_test[:250], self.y_test[:250]
+        X_report, y_report = self.X_test[250:], self.y_test[250:]
+        trainer = self.trainer(self.forest)
+        compact = trainer.compress(X_holdout, y_holdout, max_f1_drop=0.01)
+        self.assertIs(trainer.current_model, compact)
+        report = trainer.compression_report(X_report, y_report)
+        self.assertLess(report['compressed']['size_mb'], report['original']['size_mb'])
+        self.assertGreaterEqual(report['compressed']['f1'], report['original']['f1'] - 0.03)
+
+    def test_compress_finds_malicious_column(self):
+        # Klase (1, 2): maliciozna klasa 1 je prvi stupac predict_proba
+        y_train, y_test = np.where(self.y_train == 1, 1, 2), np.where(self.y_test == 1, 1, 2)
+        forest = RandomForestClassifier(n_estimators=40, random_state=42).fit(self.X_train, y_train)
+        trainer = self.trainer(forest)
+        compact = trainer.compress(self.X_test[:250], y_test[:250], max_f1_drop=0.01)
+        self.assertIsNotNone(compact)
+        agreement = np.mean(compact.predict(self.X_test[250:]) == forest.predict(self.X_test[250:]))
+        self.assertGreater(agreement, 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.drift_monitor import build_profile, DriftMonitor, DRIFT_THRESHOLD
+from src.db.database import Database
+from src.monitor import observe_checks
+
+
+class TestDriftMonitor(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        X = np.column_stack([
+            self.rng.normal(50, 10, 5000),     # kontinuirana
+            self.rng.randint(0, 3, 5000),      # diskretna
+        ]).astype(np.float32)
+        self.profile = build_profile(X, ['url_length', 'num_dots'], labels=np.array([0, 1, 1, 0]))
+        self.monitor = DriftMonitor(self.profile, window_seconds=60, windows=5, min_count=50)
+
+    def observe(self, length_mean, dots, start, count=300, step=0.1):
+        for i in range(count):
+            features = {'url_length': float(self.rng.normal(length_mean, 10)),
+                        'num_dots': int(self.rng.randint(0, 3)) if dots is None else dots}
+            self.monitor.observe(features, i % 4 == 0, seconds=0.001, now=start + i * step)
+
+    def test_profile_bins(self):
+        features = self.profile['features']
+        self.assertEqual(features['num_dots']['edges'], [0.5, 1.5])
+        self.assertLessEqual(len(features['url_length']['reference']), 10)
+        self.assertAlmostEqual(sum(features['url_length']['reference']), 1.0)
+        self.assertEqual(self.profile['malicious_rate'], 0.5)
+
+    def test_stable_traffic_has_low_psi(self):
+        self.observe(50, None, start=1000)
+        report = self.monitor.report(now=1030)
+        self.assertEqual(report['checks'], 300)
+        self.assertEqual(report['drifted'], [])
+        self.assertLess(report['features']['url_length']['psi'], 0.1)
+        self.assertEqual(report['malicious_rate'], 0.25)
+        self.assertEqual(report['sources']['model']['mean_ms'], 1.0)
+
+    def test_shifted_features_are_reported(self):
+        self.observe(80, 2, start=1000)
+        report = self.monitor.report(now=1030)
+        self.assertEqual(set(report['drifted']), {'url_length', 'num_dots'})
+        self.assertGreater(report['features']['num_dots']['psi'], DRIFT_THRESHOLD)
+
+    def test_old_windows_roll_out(self):
+        self.observe(80, 2, start=0, count=60, step=1)
+        self.observe(50, None, start=600, count=300, step=0.2)
+        report = self.monitor.report(now=660)
+        # Prozori stariji od 5 minuta su zamijenjeni novima
+        self.assertEqual(report['checks'], 300)
+        self.assertEqual(report['drifted'], [])
+        self.assertEqual(self.monitor.report(windows=1, now=1000)['checks'], 0)
+
+    def test_checks_without_features_count_only_throughput(self):
+        for i in range(10):
+            self.monitor.observe(None, False, 'cache', now=1000 + i)
+        report = self.monitor.report(now=1010)
+        self.assertEqual(report['sources']['cache']['checks'], 10)
+        self.assertEqual(report['features']['url_length'], {'count': 0, 'psi': None})
+        self.assertAlmostEqual(report['checks_per_second'], 1.0, places=1)
+
+    def test_history_counts_only_model_vectors(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            db = Database(os.path.join(tmp_dir, 'checks.db'))
+            features = {'url_length': 50.0, 'num_dots': 1}
+            for source in ('model', 'model', 'index', 'cache', 'whitelist', 'heuristic'):
+                db.add_check('http://example.com/', False, 0.9, features, model_version='rf:1', source=source)
+            # Red spremljen prije stupca source
+            db.add_check('http://example.com/', False, 0.9, features, model_version='rf:1')
+            last_id = observe_checks(db, self.monitor, since_id=0)
+        finally:
+            shutil.rmtree(tmp_dir)
+        report = self.monitor.report(now=time.time())
+        self.assertEqual(last_id, 7)
+        self.assertEqual({source: item['checks'] for source, item in report['sources'].items()},
+                         {'model': 2, 'index': 1, 'cache': 1, 'whitelist': 1, 'heuristic': 1, 'unknown': 1})
+        # Ponovljeni URL-ovi i heuristike ne ulaze u histograme, kao ni u /monitor
+        self.assertEqual(report['features']['url_length']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 import unittest
 import sys
 import os
+import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.features.feature_extractor import FeatureExtractor
+from src.features.feature_extractor import FeatureExtractor, feature_row
+from src.features.heuristics import has_immediate_flags
 
 class TestFeatureExtractor(unittest.TestCase):
     def setUp(self):
@@ -33,5 +35,54 @@ def test_shortened_url(self):
         features = self.extractor.extract_features(url)
         self.assertTrue(features['is_shortened_url'])
 
+    def test_feature_order_matches_names(self):
+        # Trening puni stupce po _get_feature_names(), posluživanje po redoslijedu vrijednosti
+        features = self.extractor.extract_features("http://paypa1-secure.com/login.php?x=1")
+        self.assertEqual(list(features), self.extractor._get_feature_names())
+
+    def test_training_columns_match_serving_rows(self):
+        from src.train import create_feature_matrix
+        urls = ["http://paypa1-secure.com/login.php?x=1", "https://www.python.org/doc", "http://bit.ly/abc"]
+        matrix, names = create_feature_matrix(urls)
+        self.assertEqual(names, self.extractor._get_feature_names())
+        for url, row in zip(urls, matrix):
+            # Stupac i u treningu i u posluživanju nosi istu značajku
+            expected = np.array(feature_row(self.extractor.extract_features(url)), dtype=np.float32)
+            np.testing.assert_array_equal(row, expected)
+        
+    def test_profile_rows_are_those_the_model_scores(self):
+        from src.train import create_feature_matrix, model_scored_mask
+        urls = ["https://www.python.org/doc", "http://bit.ly/abc", "http://example.com/admin",
+                "http://example.com/" + "a" * 100, "http://news.example.org/article/42"]
+        matrix, names = create_feature_matrix(urls)
+        # Whitelist, shortener, sumnjiva riječ i predug URL nikad ne dođu do modela
+        self.assertEqual(model_scored_mask(urls, matrix, names).tolist(), [False, False, False, False, True])
+
+    def test_path_params_do_not_change_path_features(self):
+        features = self.extractor.extract_features("http://shop.com/cart;x=%2e%2e")
+        self.assertFalse(features['has_suspicious_chars'])
+        self.assertEqual(self.extractor.extract_features("http://shop.com/login;jsessionid=ABC")['path_length'], 6)
+
+    def test_lazy_features_compute_only_read_groups(self):
+        url = "http://bit.ly/abc123"
+        lazy = self.extractor.lazy_features(url)
+        self.assertTrue(lazy['is_shortened_url'])
+        self.assertEqual(set(lazy.computed()), {
+            'domain_length', 'has_ip', 'subdomain_count', 'domain_digit_ratio', 'has_valid_tld',
+            'domain_hyphen_count', 'domain_token_count', 'longest_domain_token', 'suspicious_domain',
+            'domain_length_suspicious', 'multiple_subdomains', 'is_shortened_url'
+        })
+        self.assertEqual(lazy.to_dict(), self.extractor.extract_features(url))
+        
+    def test_flags_skip_brand_checks_when_decided_early(self):
+        lazy = self.extractor.lazy_features("http://bit.ly/abc123")
+        self.assertTrue(has_immediate_flags(lazy.parsed_url, lazy))
+        self.assertNotIn('has_typosquatting', lazy.computed())
+        # Isti rezultat kao s punim vektorom
+        for url in ["https://www.python.org/doc", "http://g00gle.com/", "http://example.com/a%20b"]:
+            lazy = self.extractor.lazy_features(url)
+            self.assertEqual(has_immediate_flags(url, lazy),
+                             has_immediate_flags(url, self.extractor.extract_features(url)))
+
 if __name__ == '__main__':
     unittest.main()
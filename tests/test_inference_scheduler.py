@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.inference_scheduler import InferenceScheduler
+
+
+class GatedModel:
+    """Fake model that records batch sizes; the first call blocks until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def predict_proba(self, rows):
+        self.calls.append(len(rows))
+        self.entered.set()
+        self.release.wait(5)
+        return [[1 - row[0], row[0]] for row in rows]
+
+
+class TestInferenceScheduler(unittest.TestCase):
+    def queue_behind_first_call(self, model, scheduler, rows):
+        """Submit one row, then queue ``rows`` while the model is busy with it"""
+        first = scheduler.submit([0.0])
+        self.assertTrue(model.entered.wait(5))
+        futures = [scheduler.submit(row) for row in rows]
+        model.release.set()
+        return [first] + futures
+
+    def test_queued_rows_are_scored_in_batches(self):
+        model = GatedModel()
+        scheduler = InferenceScheduler(model.predict_proba, max_batch_size=16, max_wait_ms=50)
+        rows = [[i / 100] for i in range(40)]
+        futures = self.queue_behind_first_call(model, scheduler, rows)
+        results = [future.result(timeout=5) for future in futures]
+        scheduler.close()
+
+        # Rezultati se vraćaju svom zahtjevu
+        self.assertEqual(results, [[1.0, 0.0]] + [[1 - row[0], row[0]] for row in rows])
+        # Redovi koji su čekali idu u model u batchevima do max_batch_size
+        self.assertEqual(model.calls, [1, 16, 16, 8])
+        self.assertEqual((scheduler.batches, scheduler.rows), (4, 41))
+        self.assertAlmostEqual(scheduler.mean_batch_size, 41 / 4)
+
+    def test_batch_size_one_calls_model_per_row(self):
+        model = GatedModel()
+        scheduler = InferenceScheduler(model.predict_proba, max_batch_size=1, max_wait_ms=50)
+        futures = self.queue_behind_first_call(model, scheduler, [[0.5]] * 5)
+        for future in futures:
+            future.result(timeout=5)
+        scheduler.close()
+        self.assertEqual(model.calls, [1] * 6)
+
+    def test_lone_request_is_scored_without_a_full_batch(self):
+        model = GatedModel()
+        model.release.set()
+        scheduler = InferenceScheduler(model.predict_proba, max_batch_size=32, max_wait_ms=20)
+        self.assertEqual(scheduler.score([0.25], timeout=5), [0.75, 0.25])
+        scheduler.close()
+        self.assertEqual(model.calls, [1])
+
+    def test_model_error_reaches_every_request(self):
+        def failing(rows):
+            raise RuntimeError("model unavailable")
+
+        scheduler = InferenceScheduler(failing, max_wait_ms=5)
+        futures = [scheduler.submit([0.1]) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=1)
+        scheduler.close()
+
+    def test_close_scores_queued_rows(self):
+        release = threading.Event()
+
+        def blocking(rows):
+            release.wait(1)
+            return [row[0] for row in rows]
+
+        scheduler = InferenceScheduler(blocking, max_batch_size=1, max_wait_ms=0)
+        futures = [scheduler.submit([i]) for i in range(3)]
+        release.set()
+        scheduler.close()
+        self.assertEqual([future.result(timeout=1) for future in futures], [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
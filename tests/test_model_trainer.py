@@ -1,7 +1,10 @@
 import unittest
 import sys
 import os
+import shutil
+import tempfile
 import numpy as np
+from unittest import mock
 from sklearn.datasets import make_classification
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,7 +12,12 @@
 
 class TestModelTrainer(unittest.TestCase):
     def setUp(self):
-        self.trainer = ModelTrainer()
+        # Modeli i cache pretrage u privremeni direktorij, ne u models/ repozitorija
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        self.trainer = ModelTrainer(model_path=self.model_dir)
+        # Bez cachea se svaki put trenira - manja šuma je dovoljna za provjeru tijeka
+        self.trainer.param_grids['random_forest']['params']['n_estimators'] = [50]
         # Kreiramo sintetičke podatke za testiranje
         X, y = make_classification(n_samples=1000, n_features=37, 
                                  n_classes=2, random_state=42)
@@ -35,18 +43,53 @@ def test_model_save_load(self):
         best_model = self.trainer.select_best_model(results)
         
         # Spremimo model
-        test_model_path = os.path.join('models', 'test_model.joblib')
+        test_model_path = os.path.join(self.model_dir, 'test_model.joblib')
         self.trainer.save_model('test_model.joblib')
         
         # Provjerimo da li postoji
         self.assertTrue(os.path.exists(test_model_path))
         
         # Učitamo model
-        new_trainer = ModelTrainer()
+        new_trainer = ModelTrainer(model_path=self.model_dir)
         new_trainer.load_model('test_model.joblib')
-        
-        # Obrišemo test model
-        os.remove(test_model_path)
+
+    def test_search_results_cached(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            trainer = ModelTrainer(search_cache_dir=cache_dir)
+            trainer.param_grids['random_forest']['params']['n_estimators'] = [10]
+            first = trainer.train_all_models(self.X, self.y)
+
+            # Proširena mreža: samo nova kombinacija se računa
+            trainer = ModelTrainer(search_cache_dir=cache_dir, n_jobs=1)
+            trainer.param_grids['random_forest']['params']['n_estimators'] = [10, 20]
+            with mock.patch('src.models.model_trainer._fit_and_score', return_value=0.5) as fit:
+                second = trainer.train_all_models(self.X, self.y)
+            self.assertEqual(fit.call_count, 5)  # 1 nova kombinacija x 5 foldova
+            self.assertEqual(second['logistic_regression'], first['logistic_regression'])
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_search_cache_key_includes_cv_and_base_params(self):
+        def fits(**settings):
+            trainer = ModelTrainer(model_path=self.model_dir, n_jobs=1, **settings)
+            del trainer.param_grids['logistic_regression']
+            trainer.param_grids['random_forest']['params']['n_estimators'] = [10]
+            return trainer
+
+        trainer = fits()
+        trainer.train_all_models(self.X, self.y)
+        with mock.patch('src.models.model_trainer._fit_and_score', return_value=0.5) as fit:
+            fits().train_all_models(self.X, self.y)
+            self.assertEqual(fit.call_count, 0)
+            # Drugi broj foldova
+            fits(cv=3).train_all_models(self.X, self.y)
+            self.assertEqual(fit.call_count, 3)
+            # Drugi parametar baznog modela izvan mreže
+            trainer = fits()
+            trainer.param_grids['random_forest']['model'].set_params(random_state=7)
+            trainer.train_all_models(self.X, self.y)
+            self.assertEqual(fit.call_count, 8)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+from scipy import sparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.features.feature_extractor import FeatureExtractor
+from src.features.ngram_features import HashedNgramFeatures
+from src.models.model_trainer import ModelTrainer
+from src.models.model_server import ModelServer
+
+URLS = [
+    "https://www.google.com",
+    "http://g00gle.com/admin/login.php",
+    "https://example.com/docs/index.html",
+    "http://suspicious-bank-login.com/admin/password.php",
+]
+
+
+class TestHashedNgramFeatures(unittest.TestCase):
+    def setUp(self):
+        self.stage = HashedNgramFeatures(ngram_range=(2, 4), n_features=2 ** 10, batch_size=3)
+
+    def test_transform_shape(self):
+        matrix = self.stage.transform(URLS)
+        self.assertTrue(sparse.isspmatrix_csr(matrix))
+        self.assertEqual(matrix.shape, (len(URLS), 2 ** 10))
+        # Batch obrada mora dati isti rezultat kao jedan poziv
+        single = HashedNgramFeatures((2, 4), 2 ** 10, batch_size=100).transform(URLS)
+        self.assertEqual((matrix != single).nnz, 0)
+
+    def test_combine_with_dense(self):
+        extractor = FeatureExtractor()
+        dense = np.array([list(extractor.extract_features(url).values()) for url in URLS])
+        combined = self.stage.combine(dense, URLS)
+        self.assertEqual(combined.shape, (len(URLS), dense.shape[1] + 2 ** 10))
+
+    def test_logistic_regression_uses_ngrams(self):
+        extractor = FeatureExtractor()
+        urls = URLS * 10
+        X = np.array([list(extractor.extract_features(url).values()) for url in urls])
+        y = np.array([0, 1, 0, 1] * 10)
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        trainer = ModelTrainer(model_path=model_dir, ngram_stage=self.stage)
+        del trainer.param_grids['random_forest']
+        results = trainer.train_all_models(X, y, urls=urls)
+        trainer.select_best_model(results)
+        self.assertTrue(trainer.current_uses_ngrams)
+        self.assertEqual(trainer.current_model.coef_.shape[1], X.shape[1] + 2 ** 10)
+        self.assertEqual(len(trainer.predict(X, urls=urls)), len(urls))
+
+    def test_saved_ngram_model_is_served(self):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        extractor = FeatureExtractor()
+        urls = URLS * 10
+        X = np.array([list(extractor.extract_features(url).values()) for url in urls])
+        y = np.array([0, 1, 0, 1] * 10)
+        trainer = ModelTrainer(model_path=model_dir, ngram_stage=self.stage)
+        del trainer.param_grids['random_forest']
+        trainer.select_best_model(trainer.train_all_models(X, y, urls=urls))
+        trainer.save_model('ngram_model.joblib')
+
+        server = ModelServer(model_dir, 'ngram_model.joblib')
+        server.load()
+        self.assertTrue(server.uses_ngrams)
+        expected = trainer.current_model.predict_proba(self.stage.combine(X[:4], URLS))
+        np.testing.assert_allclose(server.predict_proba(X[:4].tolist(), urls=URLS), expected)
+        self.assertEqual(server.malicious_proba(X[:4].tolist(), urls=URLS).shape, (4,))
+        # Bez URL-ova se n-gram stupci ne mogu izgraditi
+        with self.assertRaises(ValueError):
+            server.predict_proba(X[:4].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
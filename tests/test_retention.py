@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.database import Database
+from src.db.retention import RetentionManager
+
+
+NOW = datetime(2026, 6, 15, 12, 0, 0)
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmp_dir, 'checks.db'))
+        dates = ['2026-01-10 08:00:00', '2026-01-20 09:00:00', '2026-02-03 10:00:00',
+                 '2026-03-16 23:59:59', '2026-03-17 00:00:00', '2026-06-14 12:00:00']
+        with sqlite3.connect(self.db.db_file) as conn:
+            for i, date in enumerate(dates):
+                conn.execute('''
+                    INSERT INTO url_checks (url, check_date, is_malicious, confidence, domain)
+                    VALUES (?, ?, ?, 0.9, ?)
+                ''', (f'http://site{i % 2}.com/{i}', date, i % 2 == 0, f'site{i % 2}.com'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def hot_dates(self):
+        with sqlite3.connect(self.db.db_file) as conn:
+            return [row[0] for row in conn.execute('SELECT check_date FROM url_checks ORDER BY id')]
+
+    def count(self, db_file, table):
+        with sqlite3.connect(db_file) as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def test_moves_old_rows_to_monthly_tables(self):
+        before = self.db.get_dashboard_stats()
+        manager = RetentionManager(self.db, hot_days=90, batch_size=1)
+        self.assertEqual(manager.archive(NOW), 4)
+        # Rez je početak dana prije 90 dana (2026-03-17)
+        self.assertEqual(self.hot_dates(), ['2026-03-17 00:00:00', '2026-06-14 12:00:00'])
+        self.assertEqual([name for _, name in manager.archives()],
+                         ['url_checks_2026_01', 'url_checks_2026_02', 'url_checks_2026_03'])
+        self.assertEqual(self.count(self.db.db_file, 'url_checks_2026_01'), 2)
+        self.assertEqual(self.db.get_dashboard_stats(), before)
+        self.assertEqual(manager.archive(NOW), 0)
+
+    def test_archive_files(self):
+        archive_dir = os.path.join(self.tmp_dir, 'archive')
+        manager = RetentionManager(self.db, hot_days=90, archive_dir=archive_dir)
+        self.assertEqual(manager.archive(NOW), 4)
+        self.assertEqual(sorted(os.listdir(archive_dir)),
+                         ['url_checks_2026_01.db', 'url_checks_2026_02.db', 'url_checks_2026_03.db'])
+        self.assertEqual(self.count(os.path.join(archive_dir, 'url_checks_2026_03.db'), 'url_checks'), 1)
+        self.assertEqual(self.db.get_dashboard_stats()['total_checks'], 6)
+
+    def test_drop_expired_keeps_rollups(self):
+        manager = RetentionManager(self.db, hot_days=90, keep_archive_months=4)
+        manager.archive(NOW)
+        self.assertEqual(manager.drop_expired(NOW), ['url_checks_2026_01'])
+        self.assertEqual(len(manager.archives()), 2)
+        stats = self.db.get_dashboard_stats()
+        self.assertEqual(stats['total_checks'], 6)
+        self.assertEqual(set(stats['domain_names']), {'site0.com', 'site1.com'})
+
+    def test_compact_returns_free_pages(self):
+        with sqlite3.connect(self.db.db_file) as conn:
+            conn.executemany('INSERT INTO url_checks (url, check_date) VALUES (?, ?)',
+                             [('http://x.com/' + 'a' * 500, '2026-01-01 00:00:00')] * 2000)
+        manager = RetentionManager(self.db, hot_days=90)
+        manager.archive(NOW)
+        with sqlite3.connect(self.db.db_file) as conn:
+            conn.execute('DROP TABLE url_checks_2026_01')
+            self.assertGreater(conn.execute('PRAGMA freelist_count').fetchone()[0], 0)
+        self.assertGreater(manager.compact(step_pages=50, pause=0), 0)
+        with sqlite3.connect(self.db.db_file) as conn:
+            self.assertEqual(conn.execute('PRAGMA freelist_count').fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
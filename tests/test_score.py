@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import joblib
+from sklearn.linear_model import LogisticRegression
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.features.feature_extractor import FeatureExtractor
+from src.score import score_file
+
+URLS = [
+    "https://www.google.com",
+    "http://bit.ly/abc123",
+    "https://example.com/docs/index.html",
+    "http://suspicious-bank-login.com/admin/password.php",
+    "https://news.example.org/article?id=42",
+]
+
+
+class TestScore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Mali model treniran na nekoliko URL-ova
+        extractor = FeatureExtractor()
+        X = [list(extractor.extract_features(url).values()) for url in URLS]
+        model = LogisticRegression().fit(X, [0, 1, 0, 1, 0])
+        self.model_file = os.path.join(self.tmp_dir, 'model.joblib')
+        joblib.dump(model, self.model_file)
+
+        self.input_file = os.path.join(self.tmp_dir, 'urls.txt')
+        with open(self.input_file, 'w') as f:
+            f.write('\n'.join(URLS * 3) + '\n')
+        self.output_file = os.path.join(self.tmp_dir, 'out.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_output(self):
+        with open(self.output_file, newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_score_file(self):
+        scored = score_file(self.input_file, self.output_file, self.model_file, batch_size=4, workers=2)
+        rows = self.read_output()
+        self.assertEqual(scored, 15)
+        self.assertEqual([row['url'] for row in rows], URLS * 3)
+        self.assertEqual(rows[0]['source'], 'whitelist')
+        self.assertEqual(rows[1]['verdict'], 'malicious')
+        self.assertEqual(rows[2]['source'], 'model')
+
+    def test_resume_from_checkpoint(self):
+        with open(self.output_file + '.checkpoint', 'w') as f:
+            f.write('{"offset": 10}')
+        with open(self.output_file, 'w') as f:
+            f.write('url,verdict,is_malicious,malicious_probability,source\n')
+        scored = score_file(self.input_file, self.output_file, self.model_file,
+                            batch_size=4, workers=1, resume=True)
+        self.assertEqual(scored, 5)
+        self.assertEqual([row['url'] for row in self.read_output()], URLS)
+
+
+if __name__ == '__main__':
+    unittest.main()
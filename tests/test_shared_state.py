@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from limits import RateLimitItemPerMinute
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.web.shared_state import SQLiteState, VerdictCache, create_shared_state, _sqlite_path
+
+
+class SharedStateTests:
+    """Zajednički testovi za sve backende (state postavlja podklasa)"""
+
+    def test_counters(self):
+        self.assertEqual(self.state.incr('ip:1', 60), 1)
+        self.assertEqual(self.state.incr('ip:1', 60, amount=2), 3)
+        self.assertEqual(self.state.get('ip:1'), 3)
+        self.assertGreater(self.state.get_expiry('ip:1'), time.time())
+        self.state.clear('ip:1')
+        self.assertEqual(self.state.get('ip:1'), 0)
+
+    def test_counter_window_expires(self):
+        self.state.incr('ip:2', 0.05)
+        time.sleep(0.1)
+        self.assertEqual(self.state.incr('ip:2', 60), 1)
+
+    def test_verdict_cache(self):
+        cache = VerdictCache(self.state, ttl=60)
+        cache.put_many({
+            'http://a.com/': {'is_malicious': False, 'confidence': 0.9},
+            'http://b.com/': {'is_malicious': True, 'confidence': 0.8}
+        })
+        found = cache.get_many(['http://a.com/', 'http://b.com/', 'http://c.com/'])
+        self.assertEqual(set(found), {'http://a.com/', 'http://b.com/'})
+        self.assertTrue(cache.get('http://b.com/')['is_malicious'])
+
+
+class TestMemoryState(SharedStateTests, unittest.TestCase):
+    def setUp(self):
+        self.state = create_shared_state('memory://')
+
+
+class TestSQLiteState(SharedStateTests, unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.uri = 'sqlite:///' + os.path.join(self.tmp_dir, 'state.db')
+        self.state = create_shared_state(self.uri)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_uri_paths(self):
+        # Kao SQLAlchemy: tri kose crte = relativna putanja, četiri = apsolutna
+        self.assertEqual(self.state.path, os.path.join(self.tmp_dir, 'state.db'))
+        self.assertEqual(_sqlite_path('sqlite:////dev/shm/state.db'), '/dev/shm/state.db')
+        self.assertEqual(_sqlite_path('sqlite:///state.db'), 'state.db')
+        self.assertEqual(_sqlite_path('sqlite:///data/state.db'), 'data/state.db')
+        self.assertEqual(_sqlite_path('sqlite://'), 'shared_state.db')
+        with self.assertRaises(ValueError):
+            _sqlite_path('sqlite://state.db')
+
+    def test_shared_between_instances(self):
+        # Dvije instance = dva workera nad istom datotekom
+        other = SQLiteState(self.state.path)
+        self.state.incr('ip:3', 60)
+        self.assertEqual(other.incr('ip:3', 60), 2)
+
+    def test_limits_storage(self):
+        limiter = FixedWindowRateLimiter(storage_from_string(self.uri))
+        limit = RateLimitItemPerMinute(3)
+        self.assertEqual([limiter.hit(limit, 'predict') for _ in range(4)], [True, True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
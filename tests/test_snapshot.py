@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.database import Database
+from src.visualization.snapshot import build_snapshot, read_manifest, SnapshotReader
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.snapshot_dir = os.path.join(self.tmp_dir, 'snapshots')
+        self.db = Database(os.path.join(self.tmp_dir, 'checks.db'))
+        self.db.add_check('http://a.com/', True, 0.9, {})
+        self.db.add_check('http://b.com/', False, 0.8, {})
+        self.evaluation_file = os.path.join(self.tmp_dir, 'evaluation.json')
+        with open(self.evaluation_file, 'w') as f:
+            json.dump({'model': 'random_forest', 'confusion_matrix': [[5, 1], [0, 4]],
+                       'feature_names': ['a', 'b'], 'feature_importances': [0.3, 0.7]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_writes_versioned_files(self):
+        manifest = build_snapshot(self.db, self.snapshot_dir, self.evaluation_file)
+        version = manifest['version']
+        self.assertEqual(set(manifest['files']), {'stats', 'daily_trend', 'confusion_matrix', 'feature_importance'})
+        for name in manifest['files'].values():
+            self.assertIn(version, name)
+            self.assertTrue(os.path.exists(os.path.join(self.snapshot_dir, name)))
+        with open(os.path.join(self.snapshot_dir, manifest['files']['stats'])) as f:
+            self.assertEqual(json.load(f)['total_checks'], 2)
+
+    def test_version_changes_only_with_data_and_old_versions_are_pruned(self):
+        first = build_snapshot(self.db, self.snapshot_dir, keep=2)
+        self.assertEqual(build_snapshot(self.db, self.snapshot_dir, keep=2)['version'], first['version'])
+
+        self.db.add_check('http://c.com/', True, 0.9, {})
+        second = build_snapshot(self.db, self.snapshot_dir, keep=2)
+        self.db.add_check('http://d.com/', True, 0.9, {})
+        third = build_snapshot(self.db, self.snapshot_dir, keep=2)
+
+        self.assertEqual(third['history'], [third['version'], second['version']])
+        files = os.listdir(self.snapshot_dir)
+        self.assertFalse(any(first['version'] in name for name in files))
+        self.assertTrue(any(second['version'] in name for name in files))
+        self.assertEqual(read_manifest(self.snapshot_dir)['version'], third['version'])
+
+    def test_reader_follows_manifest(self):
+        reader = SnapshotReader(self.snapshot_dir)
+        self.assertIsNone(reader.current())
+        build_snapshot(self.db, self.snapshot_dir)
+        self.assertEqual(reader.current()['stats']['total_checks'], 2)
+        self.db.add_check('http://c.com/', True, 0.9, {})
+        manifest = build_snapshot(self.db, self.snapshot_dir)
+        # Novi manifest s istim mtime-om (gruba rezolucija FS-a) se ne bi primijetio
+        os.utime(os.path.join(self.snapshot_dir, 'manifest.json'), ns=(1, 1))
+        self.assertEqual(reader.current()['version'], manifest['version'])
+        self.assertEqual(reader.current()['stats']['total_checks'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.features.url_parser import ParsedURL, parse_url, split_host
+
+
+class TestParsedURL(unittest.TestCase):
+    def test_components(self):
+        parsed = parse_url("HTTPS://Mail.Google.co.uk:443/Inbox/Message?id=5&x=#top")
+        self.assertEqual(parsed.scheme, 'https')
+        self.assertEqual(parsed.host, 'mail.google.co.uk')
+        self.assertEqual(parsed.labels, ('mail', 'google'))
+        self.assertEqual(parsed.registered_domain, 'google.co.uk')
+        self.assertEqual(parsed.path_tokens, ('inbox', 'message'))
+        self.assertEqual(parsed.query_params, (('id', '5'), ('x', '')))
+        self.assertEqual(parsed.canonical, 'https://mail.google.co.uk/Inbox/Message?id=5&x=')
+
+    def test_path_params_are_not_part_of_the_path(self):
+        # Kao urlparse u izvornom extractoru: /login;jsessionid=ABC ima putanju /login
+        parsed = parse_url("http://shop.com/login;jsessionid=ABC?x=1")
+        self.assertEqual((parsed.path, parsed.params), ('/login', 'jsessionid=ABC'))
+        self.assertEqual(parsed.path_tokens, ('login',))
+        self.assertEqual(parsed.canonical, 'http://shop.com/login;jsessionid=ABC?x=1')
+
+    def test_cached(self):
+        self.assertIs(parse_url("http://example.com/a"), parse_url("http://example.com/a"))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            ParsedURL("http://example.com").extra = 1
+
+    def test_split_host(self):
+        self.assertEqual(split_host('www.example.com'), (('www', 'example'), 'example', 'example.com'))
+        self.assertEqual(split_host('localhost'), (('localhost',), 'localhost', 'localhost'))
+
+
+if __name__ == '__main__':
+    unittest.main()
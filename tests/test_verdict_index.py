@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db.database import Database
+from src.db.verdict_index import VerdictIndex
+from src.features.url_parser import parse_url
+
+
+class TestVerdictIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmp_dir, 'checks.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def lookup(self, index, url):
+        return index.lookup(parse_url(url).canonical)
+
+    def test_load_current_model_and_heuristic_verdicts(self):
+        self.db.add_check('http://a.com/', True, 0.9, {}, model_version='rf:1')
+        self.db.add_check('http://b.com/', True, 0.8, {}, model_version='rf:0')
+        self.db.add_check('http://c.com/', False, 0.95, {}, status_message='Known safe domain')
+        newest = self.db.add_check('http://A.com', False, 0.6, {'f': 1}, model_version='rf:1')
+
+        index = VerdictIndex()
+        self.assertEqual(index.load(self.db, model_version='rf:1'), 2)
+
+        # Zadnja provjera istog (kanonskog) URL-a pobjeđuje
+        verdict = self.lookup(index, 'http://a.com/')
+        self.assertEqual(verdict.row_id, newest)
+        self.assertFalse(verdict.is_malicious)
+        self.assertAlmostEqual(verdict.confidence, 0.6, places=2)
+        self.assertEqual(self.db.get_check_features(verdict.row_id), {'f': 1})
+
+        self.assertEqual(self.lookup(index, 'http://c.com/').warning, 'Known safe domain')
+        # Presuda druge verzije modela se ne koristi
+        self.assertIsNone(self.lookup(index, 'http://b.com/'))
+
+    def test_add_merge_and_expiry(self):
+        index = VerdictIndex(max_age_days=1, merge_threshold=3)
+        index.load(self.db, model_version='rf:1')
+        for i in range(10):
+            index.add(f'http://site{i}.com/', i + 1, i % 2 == 0, 0.5 + i / 100)
+        index.add('http://site0.com/', 99, False, 0.7)
+        index.add('http://old.com/', 100, True, 0.9, checked_at=time.time() - 2 * 86400)
+
+        self.assertEqual(len(index), 11)
+        for i in range(1, 10):
+            self.assertEqual(index.lookup(f'http://site{i}.com/').row_id, i + 1)
+        self.assertEqual(index.lookup('http://site0.com/').row_id, 99)
+        self.assertIsNone(index.lookup('http://old.com/'))
+        self.assertIsNone(index.lookup('http://unknown.com/'))
+
+    def test_sync_picks_up_other_writers(self):
+        index = VerdictIndex()
+        index.load(self.db, model_version='rf:1')
+        row_id = self.db.add_check('http://later.com/', True, 0.9, {}, model_version='rf:1')
+        self.assertIsNone(self.lookup(index, 'http://later.com/'))
+        self.assertEqual(index.sync(self.db), 1)
+        self.assertEqual(self.lookup(index, 'http://later.com/').row_id, row_id)
+
+    def test_legacy_rows_without_key(self):
+        self.db.add_check('http://legacy.com/x', True, 0.95, {}, status_message='Suspicious patterns detected')
+        with sqlite3.connect(self.db.db_file) as conn:
+            conn.execute('UPDATE url_checks SET url_key = NULL')
+        index = VerdictIndex()
+        index.load(self.db)
+        self.assertIsNotNone(self.lookup(index, 'http://legacy.com/x'))
+
+    def test_memory_per_million(self):
+        for i in range(200):
+            self.db.add_check(f'http://site{i}.com/', False, 0.9, {}, model_version='rf:1')
+        index = VerdictIndex()
+        index.load(self.db, model_version='rf:1')
+        self.assertEqual(index.bytes_per_million(), 24_000_000)
+
+
+if __name__ == '__main__':
+    unittest.main()